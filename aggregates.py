@@ -0,0 +1,597 @@
+import numpy as np
+import pandas as pd
+
+
+# Filterable dimensions in cube axis order: sourceList, orderTypeList, clientTypeList
+CUBE_DIMENSIONS = ("Referral Source", "Order Type", "Client Type")
+
+# Date column each metric row counts on, and the frame it comes from
+METRIC_DATE_COLUMNS = {
+    "Start Date Count": ("orders", "Start Date"),
+    "End Date Count": ("orders", "End Date"),
+    "Temps Created Date Count": ("temps", "Date/Time Created"),
+    "Clients Created Date Count": ("orders", "Date/Time Created"),
+}
+
+# Start and end events of the orders counted as placements, on their own cubes
+PLACEMENT_DATE_COLUMNS = {
+    "Placement Starts": "Start Date",
+    "Placement Ends": "End Date",
+}
+
+
+def to_day(value):
+    """
+    Convert a date, datetime or DatePickerRange string to a numpy day.
+    """
+    if value is None:
+        return None
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def to_days(values):
+    """
+    Convert a column of dates to a datetime64[D] array.
+    """
+    return pd.to_datetime(pd.Series(values)).values.astype("datetime64[D]")
+
+
+def dimension_codes(column, categories):
+    """
+    Return integer codes of a column against a category index, -1 where missing.
+
+    Categorical columns built on the same dictionary reuse their codes directly.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype) and column.cat.categories.equals(categories):
+        return column.cat.codes.values.astype(np.int64)
+    return categories.get_indexer(column.values)
+
+
+def build_dimensions(*frames):
+    """
+    Return one shared, sorted category index per filterable dimension across frames.
+    """
+    dimensions = {}
+    for name in CUBE_DIMENSIONS:
+        values = [frame[name] for frame in frames if name in frame]
+        first = values[0].dtype
+        if isinstance(first, pd.CategoricalDtype) and all(v.dtype == first for v in values):
+            # Frames already share one dictionary
+            dimensions[name] = pd.Index(first.categories)
+            continue
+        dimensions[name] = pd.Index(pd.concat(values).astype(object).dropna().unique()).sort_values()
+    return dimensions
+
+
+class DateIndex:
+    """
+    Binary-search index over a frame sorted by a datetime64 column.
+
+    A date range resolves to a contiguous row slice, so a short window only
+    touches the rows inside it.
+    """
+
+    def __init__(self, frame, column):
+        self.frame = frame
+        self.values = frame[column].values
+        # Missing dates sort last and never fall inside a range
+        self.size = len(self.values) - int(np.isnat(self.values).sum())
+
+    def bounds(self, start_date, end_date):
+        """
+        Return the start and stop row positions for an inclusive date range.
+        """
+        start = 0 if start_date is None else np.searchsorted(self.values[:self.size], to_day(start_date), side="left")
+        if end_date is None:
+            stop = self.size
+        else:
+            stop = np.searchsorted(self.values[:self.size], to_day(end_date) + np.timedelta64(1, "D"), side="left")
+        return int(start), int(max(start, stop))
+
+    def slice(self, start_date, end_date):
+        start, stop = self.bounds(start_date, end_date)
+        return self.frame.iloc[start:stop]
+
+
+# Order columns the segment filters select on
+FILTER_DIMENSIONS = ("Referral Source", "Order Type", "Client Type", "Master Client")
+
+
+class InvertedIndex:
+    """
+    Maps each value of the filter dimensions to the sorted row positions holding it.
+
+    A selection is resolved to rows by OR-ing the selected values' postings within
+    a dimension and AND-ing across dimensions; unselected dimensions are skipped.
+    Only the most selective dimension's postings are materialized, the others are
+    checked through their codes, so the cost follows the number of matching rows.
+    """
+
+    def __init__(self, frame, columns=FILTER_DIMENSIONS):
+        self.size = len(frame)
+        self.categories = {}
+        self.codes = {}
+        self.rows = {}
+        self.offsets = {}
+        for column in columns:
+            if column not in frame:
+                continue
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories, codes = values.cat.categories, values.cat.codes.values.astype(np.int32)
+            else:
+                codes, categories = pd.factorize(values, sort=True)
+                codes = codes.astype(np.int32)
+            # Stable sort groups rows by code and keeps each group in row order; missing (-1) sorts first
+            order = np.argsort(codes, kind="stable").astype(np.int32)
+            counts = np.bincount(codes + 1, minlength=len(categories) + 1)
+            self.categories[column] = pd.Index(categories)
+            self.codes[column] = codes
+            self.rows[column] = order
+            self.offsets[column] = np.cumsum(counts)
+
+    def updated(self, kept, kept_positions, added, added_positions):
+        """
+        Return an index over merged orders, moving the previous postings instead of rebuilding them.
+
+        kept flags the previous rows still present, kept_positions and added_positions
+        give the merged positions of those rows and of the added frame's rows. Only the
+        added rows are sorted; previous postings keep their order as positions only shift.
+        """
+        size = len(kept_positions) + len(added_positions)
+        moved = np.full(self.size, -1, dtype=np.int64)
+        moved[kept] = kept_positions
+        index = InvertedIndex.__new__(InvertedIndex)
+        index.size = size
+        index.categories, index.codes, index.rows, index.offsets = {}, {}, {}, {}
+        for column, categories in self.categories.items():
+            values = added[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Dictionaries are only ever extended, so previous codes keep their meaning
+                categories = values.cat.categories
+                added_codes = values.cat.codes.values.astype(np.int32)
+            else:
+                new = pd.Index(values.dropna().unique()).difference(categories)
+                categories = categories.append(new.sort_values())
+                added_codes = categories.get_indexer(values.values).astype(np.int32)
+            old_codes = self.codes[column]
+            codes = np.empty(size, dtype=np.int32)
+            codes[kept_positions] = old_codes[kept]
+            codes[added_positions] = added_codes
+
+            # Postings as (code + 1, position) keys, sorted by code then position
+            rows = moved[self.rows[column]]
+            present = rows >= 0
+            old_keys = (old_codes[self.rows[column]][present].astype(np.int64) + 1) * size + rows[present]
+            new_keys = np.sort((added_codes.astype(np.int64) + 1) * size + added_positions)
+            keys = np.insert(old_keys, np.searchsorted(old_keys, new_keys), new_keys)
+
+            index.categories[column] = pd.Index(categories)
+            index.codes[column] = codes
+            index.rows[column] = (keys % size).astype(np.int32)
+            index.offsets[column] = np.cumsum(np.bincount(codes + 1, minlength=len(categories) + 1))
+        return index
+
+    def present_values(self, column):
+        """
+        Return the values of column held by at least one row, in order of first appearance.
+        """
+        offsets, rows = self.offsets[column], self.rows[column]
+        # offsets[code] starts the code's postings, whose first entry is its first row
+        codes = np.flatnonzero(np.diff(offsets) > 0)
+        first_rows = rows[offsets[codes]]
+        return self.categories[column][codes[np.argsort(first_rows, kind="stable")]]
+
+    def postings(self, column, values, start, stop):
+        """
+        Return the row slices of each selected value of column inside [start, stop).
+        """
+        codes = self.categories[column].get_indexer(list(values))
+        offsets, rows = self.offsets[column], self.rows[column]
+        slices = []
+        for code in codes[codes >= 0]:
+            posting = rows[offsets[code]:offsets[code + 1]]
+            low, high = np.searchsorted(posting, (start, stop))
+            slices.append(posting[low:high])
+        return slices
+
+    def select(self, selections, start=0, stop=None):
+        """
+        Return the sorted positions of rows in [start, stop) matching every selected dimension.
+
+        selections maps a column to its selected values. Returns None when nothing
+        is selected, meaning every row in the range matches.
+        """
+        stop = self.size if stop is None else stop
+        active = [(column, values) for column, values in selections.items() if values and column in self.rows]
+        if not active:
+            return None
+        resolved = [(column, values, self.postings(column, values, start, stop)) for column, values in active]
+        resolved.sort(key=lambda item: sum(len(posting) for posting in item[2]))
+
+        _, _, postings = resolved[0]
+        if not postings:
+            return np.array([], dtype=np.int32)
+        # Values of one dimension never share a row, so the OR is a concatenation
+        result = np.sort(np.concatenate(postings)) if len(postings) > 1 else postings[0]
+        for column, values, _ in resolved[1:]:
+            if not len(result):
+                break
+            allowed = np.zeros(len(self.categories[column]) + 1, dtype=bool)
+            codes = self.categories[column].get_indexer(list(values))
+            allowed[codes[codes >= 0]] = True
+            # Missing values (-1) index the trailing False
+            result = result[allowed[self.codes[column][result]]]
+        return result
+
+
+class CountCube:
+    """
+    Daily counts indexed by (date, Referral Source, Order Type, Client Type).
+
+    Dimensions are stored as dense integer codes, so a filtered series is a
+    date slice plus a sum over the selected codes.
+    """
+
+    def __init__(self, dates, counts, dimensions, date_column):
+        self.dates = dates
+        self.counts = counts
+        self.dimensions = dimensions
+        self.date_column = date_column
+
+    @staticmethod
+    def _cells(frame, date_column, dimensions):
+        """
+        Return the days of frame and, per dimension, each row's code with missing
+        values on the trailing code.
+        """
+        days = to_days(frame[date_column])
+        valid = ~np.isnat(days)
+        codes = []
+        for name, categories in zip(CUBE_DIMENSIONS, dimensions):
+            if categories is None:
+                # The frame has no such column, e.g. temps have no order type
+                codes.append(np.zeros(int(valid.sum()), dtype=np.int64))
+                continue
+            dimension = dimension_codes(frame[name], categories)[valid]
+            codes.append(np.where(dimension < 0, len(categories), dimension))
+        return days[valid], codes
+
+    @classmethod
+    def build(cls, frame, date_column, dimensions):
+        cube_dimensions = [dimensions[name] if name in frame else None for name in CUBE_DIMENSIONS]
+        days, codes = cls._cells(frame, date_column, cube_dimensions)
+        dates, date_codes = np.unique(days, return_inverse=True)
+
+        shape = [len(dates)]
+        flat = date_codes.astype(np.int64)
+        for categories, dimension in zip(cube_dimensions, codes):
+            size = 1 if categories is None else len(categories) + 1
+            flat = flat * size + dimension
+            shape.append(size)
+
+        counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(dates, counts.astype(np.int32), cube_dimensions, date_column)
+
+    def apply_delta(self, added, removed, dimensions):
+        """
+        Return a new cube with added rows counted and removed rows taken away.
+
+        Costs O(cube size + changed rows). Returns None if a dimension's categories
+        were reordered rather than extended, in which case the cube must be rebuilt.
+        """
+        new_dimensions = []
+        positions = []
+        for name, old in zip(CUBE_DIMENSIONS, self.dimensions):
+            if old is None:
+                new_dimensions.append(None)
+                positions.append(np.zeros(1, dtype=np.int64))
+                continue
+            new = dimensions[name]
+            if not new[:len(old)].equals(old):
+                return None
+            new_dimensions.append(new)
+            # Old codes keep their place, the old missing code moves to the new trailing one
+            positions.append(np.append(np.arange(len(old)), len(new)))
+
+        added_days, added_codes = self._cells(added, self.date_column, new_dimensions)
+        removed_days, removed_codes = self._cells(removed, self.date_column, new_dimensions)
+        dates = np.union1d(self.dates, added_days)
+
+        shape = (len(dates),) + tuple(len(p) if c is None else len(c) + 1 for c, p in zip(new_dimensions, positions))
+        counts = np.zeros(shape, dtype=np.int32)
+        counts[np.ix_(np.searchsorted(dates, self.dates), *positions)] = self.counts
+        np.add.at(counts, (np.searchsorted(dates, added_days),) + tuple(added_codes), 1)
+        np.add.at(counts, (np.searchsorted(dates, removed_days),) + tuple(removed_codes), -1)
+        return CountCube(dates, counts, new_dimensions, self.date_column)
+
+    def date_slice(self, start_date, end_date):
+        """
+        Resolve an inclusive date range to a slice over the cube's date axis.
+        """
+        start = 0 if start_date is None else np.searchsorted(self.dates, to_day(start_date), side="left")
+        stop = len(self.dates) if end_date is None else np.searchsorted(self.dates, to_day(end_date), side="right")
+        return slice(start, stop)
+
+    def series(self, start_date, end_date, selections):
+        """
+        Return dates and counts for the range, summed over the selected values of each dimension.
+
+        Empty or None selections leave a dimension unfiltered.
+        """
+        window = self.date_slice(start_date, end_date)
+        counts = self._reduce(self.counts[window], selections)
+        dates = self.dates[window]
+        present = counts > 0
+        return dates[present], counts[present]
+
+    def _reduce(self, block, selections):
+        """
+        Sum a block of cells over the selected values of each dimension, one total per date.
+        """
+        for axis, (categories, selected) in enumerate(zip(self.dimensions, selections), start=1):
+            if categories is None or not selected:
+                continue
+            codes = categories.get_indexer(list(selected))
+            block = block.take(codes[codes >= 0], axis=axis)
+        return block.sum(axis=(1, 2, 3))
+
+    def totals_through(self, days, selections):
+        """
+        Return, for each sorted day, the filtered number of rows dated on or before it.
+
+        Running totals are taken over the reduced series at query time, so nothing
+        larger than one total per date is ever held.
+        """
+        positions = np.searchsorted(self.dates, days, side="right") - 1
+        if not len(days) or positions[-1] < 0:
+            return np.zeros(len(days), dtype=np.int64)
+        totals = np.cumsum(self._reduce(self.counts[:positions[-1] + 1], selections), dtype=np.int64)
+        # Days before the first date have no rows yet
+        return np.where(positions >= 0, totals[np.maximum(positions, 0)], 0)
+
+    def cells(self):
+        """
+        Return the days and per-dimension codes of every nonzero cell, and its count.
+        """
+        positions = np.nonzero(self.counts)
+        return self.dates[positions[0]], positions[1:], self.counts[positions]
+
+
+def category_day_counts(frame, date_column, column):
+    """
+    Return the categories of column and, for every nonzero (day, category) pair,
+    the day, category code and number of rows.
+    """
+    days = to_days(frame[date_column])
+    values = frame[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories, codes = values.cat.categories, values.cat.codes.values.astype(np.int64)
+    else:
+        codes, categories = pd.factorize(values, sort=True)
+    keep = ~np.isnat(days) & (codes >= 0)
+    pairs = pd.DataFrame({"day": days[keep], "code": codes[keep]}).value_counts().sort_index()
+    return (
+        pd.Index(categories),
+        pairs.index.get_level_values("day").values.astype("datetime64[D]"),
+        pairs.index.get_level_values("code").values,
+        pairs.values,
+    )
+
+
+def daily_series(cube, start_date, end_date, selections):
+    """
+    Return every day from start to end and the cube's filtered count on it, zero filled.
+    """
+    if not len(cube.dates):
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+    start = cube.dates[0] if start_date is None else to_day(start_date)
+    end = cube.dates[-1] if end_date is None else to_day(end_date)
+    days = np.arange(start, end + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    values = np.zeros(len(days), dtype=np.int64)
+    dates, counts = cube.series(start, end, selections)
+    values[(dates - start).astype(np.int64)] = counts
+    return days, values
+
+
+def placement_rows(orders):
+    """
+    Return the orders that count as placements: a Start Date, and no End Date before it.
+    """
+    start = orders["Start Date"].values
+    end = orders["End Date"].values
+    return orders[~np.isnat(start) & ~(end < start)]
+
+
+def active_placements(start_cube, end_cube, start_date, end_date, selections):
+    """
+    Return every day in range and the number of orders active on it, started and not yet ended.
+
+    A sweep over the +1 start and -1 day-after-end events: the placement cubes hold
+    the events per day, so the value on a day is the prefix sum of starts through it
+    minus the prefix sum of ends through the day before. Both cubes count the same
+    placement_rows, so every end has its start. Orders without an End Date stay
+    active. The cubes are patched incrementally when orders change, so this series is too.
+    """
+    if not len(start_cube.dates):
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)
+    start = start_cube.dates[0] if start_date is None else to_day(start_date)
+    if end_date is not None:
+        end = to_day(end_date)
+    else:
+        end = max(start_cube.dates[-1], end_cube.dates[-1]) if len(end_cube.dates) else start_cube.dates[-1]
+    days = np.arange(start, end + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    started = start_cube.totals_through(days, selections)
+    ended = end_cube.totals_through(days - np.timedelta64(1, "D"), selections)
+    return days, started - ended
+
+
+def rolling_mean_std(values, window):
+    """
+    Return the mean, sample standard deviation and size of the trailing window before each value.
+
+    Uses prefix sums of the values and their squares, so each day costs O(1)
+    whatever the window length.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    squares = np.concatenate(([0.0], np.cumsum(values * values)))
+    stop = np.arange(len(values))
+    start = np.maximum(stop - window, 0)
+    size = stop - start
+    total = sums[stop] - sums[start]
+    total_squares = squares[stop] - squares[start]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(size > 0, total / size, np.nan)
+        variance = np.where(size > 1, (total_squares - total * mean) / (size - 1), np.nan)
+    return mean, np.sqrt(np.clip(variance, 0, None)), size
+
+
+def deviation_summary(cube, start_date, end_date, selections, window=28):
+    """
+    Return the percent of days in range more than 1 SD from their trailing mean,
+    and the percent more than 2 SD from it.
+    """
+    warm_up = None if start_date is None else to_day(start_date) - np.timedelta64(window, "D")
+    days, values = daily_series(cube, warm_up, end_date, selections)
+    if start_date is not None:
+        in_range = days >= to_day(start_date)
+    else:
+        in_range = np.ones(len(days), dtype=bool)
+    if not in_range.any():
+        return 0.0, 0.0
+    mean, std, size = rolling_mean_std(values, window)
+    # Days need at least two days of history to have a deviation
+    scored = in_range & (size > 1)
+    distance = np.abs(values - mean)
+    over_1sd = scored & (distance > std)
+    over_2sd = scored & (distance > 2 * std)
+    days_in_range = in_range.sum()
+    return 100.0 * over_1sd.sum() / days_in_range, 100.0 * over_2sd.sum() / days_in_range
+
+
+def control_limits(values):
+    """
+    Return the center line and standard deviation of a daily series.
+    """
+    if len(values) == 0:
+        return 0.0, 0.0
+    std = float(np.std(values, ddof=1)) if len(values) > 1 else 0.0
+    return float(np.mean(values)), std
+
+
+def build_control_limits(cubes):
+    """
+    Precompute each metric's control limits over its whole unfiltered history.
+    """
+    return {
+        metric: control_limits(daily_series(cubes[metric], None, None, [None] * len(CUBE_DIMENSIONS))[1])
+        for metric in METRIC_DATE_COLUMNS
+    }
+
+
+def control_chart(cube, start_date, end_date, selections, limits=None):
+    """
+    Return days, counts, center line, standard deviation and out of control days for a metric.
+
+    Limits are taken over the metric's whole filtered history unless precomputed
+    limits are given, and a day is out of control beyond 3 SD of the center line.
+    """
+    if limits is None:
+        limits = control_limits(daily_series(cube, None, None, selections)[1])
+    mean, std = limits
+    days, values = daily_series(cube, start_date, end_date, selections)
+    out_of_control = np.abs(values - mean) > 3 * std
+    return days, values, mean, std, out_of_control
+
+
+def daily_counts(orders, temps):
+    """
+    Return one row per date with the start, end, temps created and clients created counts.
+    """
+    # Compute value counts for each specified column and reset index
+    start_date_counts = orders['Start Date'].value_counts().reset_index()
+    end_date_counts = orders['End Date'].value_counts().reset_index()
+    temps_date_counts = temps['Date/Time Created'].value_counts().reset_index()
+    clients_date_counts = orders['Date/Time Created'].value_counts().reset_index()
+
+    # Rename columns
+    start_date_counts.columns = ['Dates', 'Start Date Count']
+    end_date_counts.columns = ['Dates', 'End Date Count']
+    temps_date_counts.columns = ['Dates', 'Temps Created Date Count']
+    clients_date_counts.columns = ['Dates', 'Clients Created Date Count']
+
+    # Merge all dataframes on 'Dates'
+    df = pd.merge(start_date_counts, end_date_counts, how='outer', on='Dates')
+    df = pd.merge(df, temps_date_counts, how='outer', on='Dates')
+    df = pd.merge(df, clients_date_counts, how='outer', on='Dates')
+    # Replace NaN values with 0 (if any)
+    df = df.fillna(0)
+    # Convert count columns to integers
+    metrics = list(METRIC_DATE_COLUMNS)
+    df[metrics] = df[metrics].astype(int)
+    return df
+
+
+def update_daily_counts(df, added, removed):
+    """
+    Return the daily count table with added orders counted and removed orders taken away.
+
+    Only the orders based columns change, and the cost follows the number of changed rows.
+    """
+    delta = {}
+    for metric, (frame, column) in METRIC_DATE_COLUMNS.items():
+        if frame != "orders":
+            continue
+        counts = added[column].value_counts().sub(removed[column].value_counts(), fill_value=0)
+        delta[metric] = counts
+    delta = pd.DataFrame(delta)
+
+    updated = df.set_index('Dates').add(delta, fill_value=0).fillna(0)
+    metrics = list(METRIC_DATE_COLUMNS)
+    updated = updated[metrics].astype(int)
+    # Dates whose orders were all removed drop out, as they would on a full load
+    updated = updated[(updated != 0).any(axis=1)]
+    updated.index.name = 'Dates'
+    return updated.reset_index()
+
+
+def update_cubes(cubes, orders, temps, added, removed):
+    """
+    Return count cubes with an orders delta applied, rebuilding any that cannot be patched.
+    """
+    frames = {"orders": orders, "temps": temps}
+    dimensions = build_dimensions(orders, temps)
+    updated = {}
+    for metric, (frame, column) in METRIC_DATE_COLUMNS.items():
+        if frame != "orders":
+            updated[metric] = cubes[metric]
+            continue
+        cube = cubes[metric].apply_delta(added, removed, dimensions)
+        if cube is None:
+            cube = CountCube.build(frames[frame], column, dimensions)
+        updated[metric] = cube
+    placements = placement_rows(orders)
+    added, removed = placement_rows(added), placement_rows(removed)
+    for name, column in PLACEMENT_DATE_COLUMNS.items():
+        cube = cubes[name].apply_delta(added, removed, dimensions)
+        if cube is None:
+            cube = CountCube.build(placements, column, dimensions)
+        updated[name] = cube
+    return updated
+
+
+def build_cubes(orders, temps):
+    """
+    Build one count cube per metric row and per placement event, sharing dimension codes across frames.
+    """
+    frames = {"orders": orders, "temps": temps}
+    dimensions = build_dimensions(orders, temps)
+    cubes = {
+        metric: CountCube.build(frames[frame], column, dimensions)
+        for metric, (frame, column) in METRIC_DATE_COLUMNS.items()
+    }
+    placements = placement_rows(orders)
+    for name, column in PLACEMENT_DATE_COLUMNS.items():
+        cubes[name] = CountCube.build(placements, column, dimensions)
+    return cubes
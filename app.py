@@ -1,18 +1,35 @@
 import os
 import pathlib
+import threading
 
 import dash
 from dash import dcc
 from dash import html
 from dash import dash_table
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import dash_daq as daq
-from collections import Counter
-import plotly.graph_objs as go
+import flask
 import datetime
-from datetime import datetime as dt
 from datetime import date
-import pandas as pd
+import numpy as np
+
+from aggregates import (
+    METRIC_DATE_COLUMNS,
+    DateIndex,
+    active_placements,
+    category_day_counts,
+    control_chart,
+    deviation_summary,
+    to_day,
+)
+from cache import LRUCache, normalize_filters, shared_cache_from_url
+from downsample import decimate, rollup_series
+from drilldown import filter_rows, page_records, parse_filter_query, sort_rows, table_columns
+from export import EXPORT_FORMATS, export_stream, frame_batches, selected_count
+from figures import scatter, typed_array, use_fast_json
+from jobs import job_manager
+from metrics import Metrics, count_cache_hit, count_rows
+from snapshot import DataWatcher, SnapshotStore, build_snapshot
 
 
 app = dash.Dash(
@@ -22,75 +39,111 @@ app = dash.Dash(
 app.title = "Remede Dashboard"
 
 server = app.server
+# Callback responses go through orjson when it is installed
+use_fast_json()
 app.config["suppress_callback_exceptions"] = True
 
 # Path
 APP_PATH = str(pathlib.Path(__file__).parent.resolve())
 
+DATA_PATH = os.environ.get("REMEDE_DATA_PATH", os.path.join(APP_PATH, "data"))
+
+# "batched" updates every sparkline from one callback, "per-row" registers one callback per metric row
+SPARKLINE_MODE = os.environ.get("REMEDE_SPARKLINE_MODE", "batched")
+
+# Ship the daily count table to the browser once and recompute sparklines and the piechart there
+CLIENTSIDE_FILTERS = os.environ.get("REMEDE_CLIENTSIDE_FILTERS", "0") == "1"
+
+# Memory bound for memoized callback results, in megabytes
+RESULT_CACHE_MB = int(os.environ.get("REMEDE_RESULT_CACHE_MB", "64"))
+
+# Cache shared by all workers: sqlite:///path/to/cache.db or redis://host:6379/0, empty to disable
+SHARED_CACHE_URL = os.environ.get("REMEDE_SHARED_CACHE", "")
+SHARED_CACHE_TTL = int(os.environ.get("REMEDE_SHARED_CACHE_TTL", "3600"))
+
+# Days of history behind the rolling mean and standard deviation of the 1SD/2SD columns
+ROLLING_WINDOW_DAYS = int(os.environ.get("REMEDE_ROLLING_WINDOW_DAYS", "28"))
+
+# Most points drawn per figure: a sparkline spans a few columns, the dive down chart all twelve
+SPARKLINE_MAX_POINTS = int(os.environ.get("REMEDE_SPARKLINE_MAX_POINTS", "120"))
+CHART_MAX_POINTS = int(os.environ.get("REMEDE_CHART_MAX_POINTS", "800"))
+
+# Orders per page of the drill-down table
+DRILLDOWN_PAGE_SIZE = int(os.environ.get("REMEDE_DRILLDOWN_PAGE_SIZE", "20"))
+
+# Orders copied out of the frame and written per chunk of a streamed export
+EXPORT_BATCH_ROWS = int(os.environ.get("REMEDE_EXPORT_BATCH_ROWS", "50000"))
+
+# Record callback and request histograms and serve them on /metrics, 0 to disable
+METRICS_ENABLED = os.environ.get("REMEDE_METRICS", "1") == "1"
+
+# Run the sparklines and piechart as background jobs in their own processes, so wide date
+# ranges do not hold a worker; needs pip install "dash[diskcache]"
+BACKGROUND_CALLBACKS = os.environ.get("REMEDE_BACKGROUND_CALLBACKS", "0") == "1"
+BACKGROUND_PATH = os.environ.get("REMEDE_BACKGROUND_PATH", os.path.join(DATA_PATH, ".cache", "jobs"))
+# Milliseconds between the browser's polls for a background job's progress and result
+BACKGROUND_POLL_MS = int(os.environ.get("REMEDE_BACKGROUND_POLL_MS", "250"))
+
+# Seconds between checks of data/ for new exports, 0 to disable
+DATA_RELOAD_INTERVAL = int(os.environ.get("REMEDE_DATA_RELOAD_INTERVAL", "30"))
+
 #### Read data ####
-# First Name,Last Name,Certification,Specialty,Work Type,Temp ID,Date/Time Created,Date/Time Modified,First Worked Date,Referral Source,Referred By
-temps = pd.read_csv("data/temps23071901_50_00.csv")
-# Order ID,Start Date,End Date,Client ID,Order Type,Order Specialty,Client Name,Client Zip,Contact,Temp ID,Client Type
-data_types = {
-    'Order ID': str,
-    'Start Date': str,
-    'End Date': str,
-    'Client ID': str,
-    'Order Type': str,
-    'Order Specialty': str,
-    'Client Name': str,
-    'Client Zip': str,
-    'Contact': str,
-    'Temp ID': str,
-    'Client Type': str,
-    'Referral Source': str,
-    'Master Client': str
-}
-orders = pd.read_csv("data/orders23071903_56_57.csv", usecols=range(1,11))
-print(orders.head())
-# Clients Client ID,Date/Time Created,Status,Client Type,Contract Date,Referral Source,Referred By Name,Master Client
-clients = pd.read_csv("data/clients23071904_17_20.csv")
-
-temps['Temp ID'] = temps['Temp ID'].astype(str)
-temps['Referral Source'] = temps['Referral Source'].astype(str)
-orders['Temp ID'] = orders['Temp ID'].astype(str)
-orders['Client ID'] = orders['Client ID'].astype(str)
-orders['Client Type'] = orders['Client Type'].astype(str)
-orders['Order Type'] =orders['Order Type'].astype(str)
-clients['Client ID'] = clients['Client ID'].astype(str)
-orders = orders.merge(temps[['Temp ID','Referral Source']], on="Temp ID", how="left")
-orders = orders.merge(clients[['Client ID','Master Client']], on="Client ID", how="left")
-orders = orders.merge(clients[['Client ID', 'Date/Time Created']], on='Client ID', how='left')
-
-df = pd.DataFrame()
-# Extract date only from datetime columns
-orders['Start Date'] = pd.to_datetime(orders['Start Date']).dt.date
-orders['End Date'] = pd.to_datetime(orders['End Date']).dt.date
-orders['Date/Time Created'] = pd.to_datetime(orders["Date/Time Created"], format= '%m/%d/%Y %I:%M %p').dt.date
-temps['Date/Time Created'] = pd.to_datetime(temps['Date/Time Created'], format= '%m/%d/%Y %H:%M').dt.date
-clients['Date/Time Created'] = pd.to_datetime(clients['Date/Time Created'], format= '%m/%d/%Y %I:%M %p').dt.date
-
-# Compute value counts for each specified column and reset index
-start_date_counts = orders['Start Date'].value_counts().reset_index()
-end_date_counts = orders['End Date'].value_counts().reset_index()
-temps_date_counts = temps['Date/Time Created'].value_counts().reset_index()
-clients_date_counts = orders['Date/Time Created'].value_counts().reset_index()
-
-# Rename columns
-start_date_counts.columns = ['Dates', 'Start Date Count']
-end_date_counts.columns = ['Dates', 'End Date Count']
-temps_date_counts.columns = ['Dates', 'Temps Created Date Count']
-clients_date_counts.columns = ['Dates', 'Clients Created Date Count']
-
-# Merge all dataframes on 'Dates'
-df = pd.merge(start_date_counts, end_date_counts, how='outer', on='Dates')
-df = pd.merge(df, temps_date_counts, how='outer', on='Dates')
-df = pd.merge(df, clients_date_counts, how='outer', on='Dates')
-# Replace NaN values with 0 (if any)
-df = df.fillna(0)
-# Convert count columns to integers
-df[['Start Date Count', 'End Date Count', 'Temps Created Date Count', 'Clients Created Date Count']] = df[['Start Date Count', 'End Date Count', 'Temps Created Date Count', 'Clients Created Date Count']].astype(int)
-params = list(df)
+def load_snapshot():
+    # Parsed, merged and typed frames come from data/.cache unless an export changed
+    return build_snapshot(DATA_PATH)
+
+# Loaded on first use, so importing the app and serving the first page never wait on the exports
+snapshots = SnapshotStore(loader=load_snapshot)
+
+# The 'Dates' column followed by one metric row per daily count column
+params = ['Dates'] + list(METRIC_DATE_COLUMNS)
+
+# Callback results keyed on normalized filter state and the version of the exports they came from
+result_cache = LRUCache(
+    max_bytes=RESULT_CACHE_MB * 1024 * 1024,
+    shared=shared_cache_from_url(SHARED_CACHE_URL, SHARED_CACHE_TTL),
+    on_hit=count_cache_hit if METRICS_ENABLED else None,
+)
+# Ordered row positions behind the drill-down table, kept per worker and keyed on the
+# snapshot they index: paging through a filtered and sorted view only slices them
+row_cache = LRUCache(max_bytes=RESULT_CACHE_MB * 1024 * 1024, max_entries=32)
+# The first load sets the version and new exports invalidate every cached result
+snapshots.on_swap(lambda snapshot: result_cache.set_version(snapshot.data_version))
+snapshots.on_swap(lambda snapshot: row_cache.set_version(snapshot.data_version))
+
+# One background job per filter state and data version; identical requests share it
+background_manager = (
+    job_manager(BACKGROUND_PATH, [lambda: snapshots.current().data_version]) if BACKGROUND_CALLBACKS else None
+)
+
+_worker_lock = threading.Lock()
+_worker_pid = None
+
+def start_worker_threads():
+    """
+    Start loading the exports in the background and watching data/ for new ones, once per process.
+
+    Threads do not survive a fork, so with gunicorn preloading each worker starts its own.
+    """
+    global _worker_pid
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+        _worker_pid = os.getpid()
+    if not snapshots.loaded():
+        threading.Thread(target=snapshots.current, name="remede-data-load", daemon=True).start()
+    # Pick up replaced csv exports without restarting workers
+    if DATA_RELOAD_INTERVAL > 0:
+        DataWatcher(snapshots, DATA_PATH, DATA_RELOAD_INTERVAL).start()
+
+def preload_data():
+    """
+    Load the exports now, e.g. in the gunicorn master so forked workers share them copy-on-write.
+    """
+    return snapshots.current()
+
+server.before_request(start_worker_threads)
+
 suffix_row = "_row"
 suffix_button_id = "_button"
 suffix_sparkline_graph = "_sparkline_graph"
@@ -98,33 +151,86 @@ suffix_count = "_count"
 suffix_sd_n = "_sd_number"
 suffix_sd_g = "_sd_graph"
 
-def filter_df(df, sourceList, orderTypeList, start_date, end_date, clientTypeList):
+# Full scale of the 2SD bars, in percent of days; a normal series has about 5% beyond 2 SD
+SD_BAR_MAX = 15
+
+def order_rows(data, selections, start_date=None, end_date=None):
+    """
+    Return the start and stop of the date range in the orders frame, and the row positions
+    within it passing the selections, or None when nothing is selected.
+    """
+    # Orders are sorted by Start Date, so the date range is a contiguous row range,
+    # and the dropdown selections resolve to rows through the inverted index
+    start, stop = data.orders_index.bounds(start_date, end_date)
+    return start, stop, data.filter_index.select(selections, start, stop)
+
+def filter_df(df, sourceList=None, orderTypeList=None, start_date=None, end_date=None, clientTypeList=None,
+              masterClientList=None):
+    """
+    Filter the dataframe based on provided sourceList, orderTypeList, start_date, end_date, clientTypeList
+    and masterClientList.
+    """
+    selections = {
+        'Referral Source': sourceList,
+        'Order Type': orderTypeList,
+        'Client Type': clientTypeList,
+        'Master Client': masterClientList,
+    }
+    data = snapshots.current()
+    if df is data.orders:
+        start, stop, rows = order_rows(data, selections, start_date, end_date)
+        if rows is None:
+            count_rows(stop - start)
+            return df.iloc[start:stop]
+        count_rows(len(rows))
+        return df.iloc[rows]
+
+    df = DateIndex(df, 'Start Date').slice(start_date, end_date)
+    count_rows(len(df))
+
+    # None or empty lists leave that column unfiltered
+    mask = None
+    for column, values in selections.items():
+        if values:
+            selected = df[column].isin(values)
+            mask = selected if mask is None else mask & selected
+    return df if mask is None else df[mask]
+
+@server.route("/export/orders.<export_format>")
+def export_orders(export_format):
     """
-    Filter the dataframe based on provided sourceList, orderTypeList, start_date, end_date, and clientTypeList.
+    Stream the orders passing the query string filters, with the semantics of filter_df.
+
+    Each batch is copied out of the frame, encoded and sent before the next, so an export
+    never holds more than one batch whatever its size.
     """
-    # If any of the lists are None, replace with a list of all unique values in that column
-    if sourceList is None:
-        sourceList = df['Referral Source'].unique()
-    if orderTypeList is None:
-        orderTypeList = df['Client ID'].unique()
-    if clientTypeList is None:
-        clientTypeList = df['Temp ID'].unique()
-
-    # Convert start_date and end_date to datetime if they're string
-    if isinstance(start_date, str):
-        start_date = pd.to_datetime(start_date)
-    if isinstance(end_date, str):
-        end_date = pd.to_datetime(end_date)
-
-    # Filter dataframe
-    mask = (
-        df['Referral Source'].isin(sourceList) & 
-        df['Client ID'].isin(orderTypeList) &
-        df['Temp ID'].isin(clientTypeList) &
-        (df['Dates'] >= start_date) &
-        (df['Dates'] <= end_date)
+    if export_format not in EXPORT_FORMATS:
+        flask.abort(404)
+    args = flask.request.args
+    selections = {
+        'Referral Source': args.getlist('sourceList'),
+        'Order Type': args.getlist('orderTypeList'),
+        'Client Type': args.getlist('clientTypeList'),
+        'Master Client': args.getlist('masterClientList'),
+    }
+    # Parsed before streaming starts, so a malformed date is a bad request rather than a server error
+    try:
+        start_date, end_date = (to_day(args.get(name) or None) for name in ('start_date', 'end_date'))
+    except (TypeError, ValueError):
+        # Unparseable, out of range, or NaT
+        flask.abort(400)
+    # Pinned for the whole download, so a reload mid-stream does not mix two exports
+    data = snapshots.current()
+    start, stop, rows = order_rows(data, selections, start_date, end_date)
+    batches = frame_batches(data.orders, start, stop, rows, EXPORT_BATCH_ROWS)
+    return flask.Response(
+        export_stream(export_format, data.orders, batches),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": 'attachment; filename="orders.{}"'.format(export_format),
+            "X-Export-Rows": str(selected_count(start, stop, rows)),
+        },
     )
-    return df[mask]
 
 def build_banner():
     return html.Div(
@@ -195,6 +301,7 @@ def build_tabs():
     )
 
 def build_segment_panel():
+    # Options are filled by update_segment_options, so the tab renders before the data loads
     return [
         html.Div(
             id="set-specs-intro-container",
@@ -212,7 +319,7 @@ def build_segment_panel():
                         html.Br(),
                         dcc.Dropdown(
                             id = "sourceList",
-                            options=[{"label": i, "value": i} for i in temps['Referral Source'].unique()],
+                            options=[],
                             multi = True,
                             placeholder="Select a source(s)",
                         ),  
@@ -225,7 +332,7 @@ def build_segment_panel():
                         html.Br(),
                         dcc.Dropdown(
                             id="orderTypeList",
-                            options=[{'label': i, "value": i} for i in orders['Order Type'].unique()],
+                            options=[],
                             multi = True,
                             placeholder="Select an order type(s)",
                         ),  
@@ -238,7 +345,7 @@ def build_segment_panel():
                         html.Br(),
                         dcc.Dropdown(
                             id="clientTypeList",
-                            options=[{'label': i, "value": i} for i in orders['Client Type'].unique()],
+                            options=[],
                             multi = True,
                             placeholder="Select a client type(s)"
                         ),  
@@ -258,10 +365,29 @@ def build_segment_panel():
                         ),  
                     ],
                 ),
+                html.Div(
+                    id="export-menu",
+                    children=[
+                        html.Label(id="export-title",children="Export Orders"),
+                        html.Br(),
+                        html.A("CSV", id="export-csv-link", href=app.get_relative_path("/export/orders.csv")),
+                        " | ",
+                        html.A("Parquet", id="export-parquet-link", href=app.get_relative_path("/export/orders.parquet")),
+                    ],
+                ),
             ],
         ),
     ],
 
+@app.callback(
+    [Output("sourceList", "options"), Output("orderTypeList", "options"), Output("clientTypeList", "options")],
+    [Input("app-tabs", "value")],
+)
+def update_segment_options(tab_switch):
+    # Precomputed with the snapshot
+    options = snapshots.current().dropdown_options
+    return options["sourceList"], options["orderTypeList"], options["clientTypeList"]
+
 def generate_piechart():
     return dcc.Graph(
         id="piechart",
@@ -287,26 +413,12 @@ def generate_piechart():
         },
     )
 
-@app.callback(
-    Output('piechart', 'figure'),
-    [Input('date-range', 'start_date'),
-     Input('date-range', 'end_date')])
-def update_piechart(start_date, end_date):
-    start_date = pd.to_datetime(start_date)
-    end_date = pd.to_datetime(end_date)
-    
-    # filter orders by date range
-    filtered_orders = orders[(orders['Start Date'] >= start_date) &
-                             (orders['Start Date'] <= end_date)]
-    
-    # count starts by specialty
-    starts_by_specialty = filtered_orders['Order Specialty'].value_counts()
-
+def build_piechart_figure(labels, values):
     return {
         "data": [
             {
-                "labels": starts_by_specialty.index,
-                "values": starts_by_specialty.values,
+                "labels": labels,
+                "values": values,
                 "type": "pie",
                 "marker": {"line": {"color": "white", "width": 1}},
                 "hoverinfo": "label",
@@ -323,6 +435,46 @@ def update_piechart(start_date, end_date):
         },
     }
 
+@result_cache.memoize()
+def update_piechart(start_date, end_date):
+    # filter orders by date range
+    filtered_orders = filter_df(snapshots.current().orders, start_date=start_date, end_date=end_date)
+    
+    # count starts by specialty
+    starts_by_specialty = filtered_orders['Order Specialty'].value_counts()
+
+    return build_piechart_figure(
+        starts_by_specialty.index.astype(str).tolist(),
+        starts_by_specialty.values.tolist(),
+    )
+
+if CLIENTSIDE_FILTERS:
+    app.clientside_callback(
+        ClientsideFunction(namespace="remede", function_name="piechart"),
+        Output('piechart', 'figure'),
+        [Input('date-range', 'start_date'),
+         Input('date-range', 'end_date'),
+         Input('daily-count-store', 'data')],
+    )
+elif BACKGROUND_CALLBACKS:
+    app.callback(
+        Output('piechart', 'figure'),
+        [Input('date-range', 'start_date'),
+         Input('date-range', 'end_date')],
+        background=True,
+        manager=background_manager,
+        running=[(Output('piechart', 'style'), {"opacity": 0.5}, {"opacity": 1})],
+        # A new date range terminates the job it replaces; so does leaving the tab
+        cancel=[Input('app-tabs', 'value')],
+        interval=BACKGROUND_POLL_MS,
+    )(update_piechart)
+else:
+    app.callback(
+        Output('piechart', 'figure'),
+        [Input('date-range', 'start_date'),
+         Input('date-range', 'end_date')],
+    )(update_piechart)
+
 def build_quick_stats_panel():
     return html.Div(
         id="quick-stats",
@@ -340,6 +492,18 @@ def build_quick_stats_panel():
                     ),
                 ],
             ),
+            html.Div(
+                id="card-3",
+                children=[
+                    html.P("Active Placements"),
+                    daq.LEDDisplay(
+                        id="active-led",
+                        color="#92e0d3",
+                        backgroundColor="#1e2130",
+                        size=50,
+                    ),
+                ],
+            ),
             html.Div(
                 id="card-2",
                 children=[
@@ -362,15 +526,16 @@ def build_quick_stats_panel():
         Input('date-range', 'end_date'),
     ]
 )
+@result_cache.memoize()
 def update_quick_stats(start_date, end_date):
     if start_date is None or end_date is None:
         return dash.no_update, dash.no_update
 
-    df = filter_df(orders, start_date, end_date)
+    df = filter_df(snapshots.current().orders, start_date=start_date, end_date=end_date)
 
-    # you would replace the below calculations with your actual calculations
+    # Placements at clients that have a master (VMS) client
     total_starts = len(df)
-    percent_vms = df['Master Client'].mean() * 100  # replace with your actual calculation
+    percent_vms = df['Master Client'].notna().mean() * 100 if total_starts else 0
 
     return total_starts, percent_vms
      
@@ -422,19 +587,12 @@ def generate_modal():
         ),
     )
 
-@app.callback(
+# Showing and hiding the modal needs no data, so it runs in the browser
+app.clientside_callback(
+    ClientsideFunction(namespace="remede", function_name="toggle_modal"),
     Output("markdown", "style"),
     [Input("learn-more-button", "n_clicks"), Input("markdown_close", "n_clicks")],
 )
-def update_click_output(button_click, close_click):
-    ctx = dash.callback_context
-
-    if ctx.triggered:
-        prop_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        if prop_id == "learn-more-button":
-            return {"display": "block"}
-
-    return {"display": "none"}
 
 def build_top_panel(_=None):
     return html.Div(
@@ -450,6 +608,13 @@ def build_top_panel(_=None):
                         id="metric-div",
                         children=[
                             generate_metric_list_header(),
+                            # Filled in by background sparkline jobs, hidden otherwise
+                            html.Progress(
+                                id="sparkline-progress",
+                                value="0",
+                                max=str(len(params) - 1),
+                                style={"visibility": "hidden", "width": "100%"},
+                            ),
                             html.Div(
                                 id="metric-rows",
                                 children=[
@@ -520,11 +685,12 @@ def generate_metric_row_helper(index):
                     "ranges": {
                         "#92e0d3": [0,3],
                         "#f4d44d": [3,7],
-                        "#f45060": [7,15],
+                        "#f45060": [7,SD_BAR_MAX],
                     }
                 },
                 showCurrentValue=False,
-                max=15,
+                # Percent of the range's days beyond 2 SD
+                max=SD_BAR_MAX,
                 value=0
             ),
         },
@@ -583,67 +749,189 @@ def generate_metric_row(id,style,col1,col2,col3,col4,col5):
         ],
     )
 
+def build_sparkline_figure(dates, counts):
+    # Long ranges are drawn as weekly or monthly totals to stay within the point budget
+    dates, counts, unit = rollup_series(dates, counts, SPARKLINE_MAX_POINTS)
+
+    # Plain dict trace with base64 typed arrays, no graph_objs validation
+    trace = scatter(
+        dates,
+        counts,
+        mode='lines+markers',
+        name='Order count' if unit == "day" else 'Order count per ' + unit,
+        line=dict(color='#f4d44d'),
+    )
+
+    # Return the figure
+    return {
+        'data': [trace],
+        'layout': {
+            "uirevision": True,
+            "margin": dict(l=0, r=0, t=4, b=4, pad=0),
+            "xaxis": dict(
+                type="date",
+                showline=False,
+                showgrid=False,
+                zeroline=False,
+                showticklabels=False,
+            ),
+            "yaxis": dict(
+                showline=False,
+                showgrid=False,
+                zeroline=False,
+                showticklabels=False,
+            ),
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+        }
+    }
+
 def create_callback(index):
+    @result_cache.memoize(name=params[index])
     def callback(sourceList, orderTypeList, start_date, end_date, clientTypeList):
         item = params[index]
-        sparkline_graph_id = item + suffix_sparkline_graph
 
-        # Convert start_date and end_date from string to datetime
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date)
+        # Slice the metric's count cube instead of filtering orders
+        dates, counts = snapshots.current().cubes[item].series(
+            start_date, end_date, [sourceList, orderTypeList, clientTypeList]
+        )
+        return build_sparkline_figure(dates, counts)
+    return callback
 
-        # Filter the dataframe
-        filtered_df = filter_df(orders, sourceList, orderTypeList, start_date, end_date, clientTypeList)
+def update_sparklines_in_background(set_progress, sourceList, orderTypeList, start_date, end_date, clientTypeList):
+    """
+    Build every metric row's sparkline figure in a background job, reporting each row done.
+    """
+    cubes = snapshots.current().cubes
+    selections = [sourceList, orderTypeList, clientTypeList]
+    figures = []
+    for item in params[1:]:
+        figures.append(build_sparkline_figure(*cubes[item].series(start_date, end_date, selections)))
+        set_progress((str(len(figures)), str(len(params) - 1)))
+    return figures
 
-        # Group by date and count the orders
-        grouped_df = filtered_df.groupby('Dates').size().reset_index(name='counts')
+@result_cache.memoize()
+def update_sparklines(sourceList, orderTypeList, start_date, end_date, clientTypeList):
+    """
+    Return every metric row's sparkline figure from a single request.
+    """
+    cubes = snapshots.current().cubes
+    selections = [sourceList, orderTypeList, clientTypeList]
+    return [
+        build_sparkline_figure(*cubes[item].series(start_date, end_date, selections))
+        for item in params[1:]
+    ]
 
-        # Generate the plot data
-        trace = go.Scatter(
-            x=grouped_df['Dates'],
-            y=grouped_df['counts'],
-            mode='lines+markers',
-            name='Order count',
-            line=dict(color='#f4d44d'),
-        )
+sparkline_inputs = [
+    Input('sourceList', 'value'),
+    Input('orderTypeList', 'value'),
+    Input('date-range', 'start_date'),
+    Input('date-range', 'end_date'),
+    Input('clientTypeList', 'value')
+]
+
+@result_cache.memoize()
+def client_count_table():
+    """
+    Return the nonzero cells of every metric's count cube and the daily starts by specialty,
+    as typed arrays, with the figure templates the browser fills in.
+    """
+    data = snapshots.current()
+    epoch = np.datetime64("1970-01-01", "D")
 
-        # Return the figure
+    def encode(days, codes, counts):
         return {
-            'data': [trace],
-            'layout': {
-                "uirevision": True,
-                "margin": dict(l=0, r=0, t=4, b=4, pad=0),
-                "xaxis": dict(
-                    showline=False,
-                    showgrid=False,
-                    zeroline=False,
-                    showticklabels=False,
-                ),
-                "yaxis": dict(
-                    showline=False,
-                    showgrid=False,
-                    zeroline=False,
-                    showticklabels=False,
-                ),
-                "paper_bgcolor": "rgba(0,0,0,0)",
-                "plot_bgcolor": "rgba(0,0,0,0)",
-            }
+            "day": typed_array((days - epoch).astype(np.int64)),
+            "codes": [typed_array(code) for code in codes],
+            "count": typed_array(counts),
         }
-    return callback
 
-for index in range(len(params)):
-    item = params[index]
-    sparkline_graph_id = item + suffix_sparkline_graph
+    metrics = []
+    for item in params[1:]:
+        cube = data.cubes[item]
+        days, codes, counts = cube.cells()
+        metrics.append({
+            "name": item,
+            "dimensions": [None if labels is None else labels.astype(str).tolist() for labels in cube.dimensions],
+            "cells": encode(days, codes, counts),
+        })
+    labels, days, codes, counts = category_day_counts(data.orders, 'Start Date', 'Order Specialty')
+    return {
+        "version": data.data_version,
+        "max_points": SPARKLINE_MAX_POINTS,
+        "metrics": metrics,
+        "specialty": {"labels": labels.astype(str).tolist(), "cells": encode(days, [codes], counts)},
+        "sparkline": build_sparkline_figure(np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64)),
+        "piechart": build_piechart_figure([], []),
+    }
+
+if CLIENTSIDE_FILTERS:
+    @app.callback(
+        Output("daily-count-store", "data"),
+        [Input("app-tabs", "value")],
+        [State("daily-count-store", "data")],
+    )
+    def update_daily_count_store(tab_switch, table):
+        # Shipped after the page renders, and again only once the exports changed
+        if table is not None and table["version"] == snapshots.current().data_version:
+            return dash.no_update
+        return client_count_table()
+
+# params[0] is the 'Dates' column, every other column is a metric row
+if CLIENTSIDE_FILTERS:
+    app.clientside_callback(
+        ClientsideFunction(namespace="remede", function_name="sparklines"),
+        [Output(item + suffix_sparkline_graph, 'figure') for item in params[1:]],
+        sparkline_inputs + [Input('daily-count-store', 'data')],
+    )
+elif BACKGROUND_CALLBACKS:
     app.callback(
-        Output(sparkline_graph_id, 'figure'),
-        [
-            Input('sourceList', 'value'),
-            Input('orderTypeList', 'value'),
-            Input('date-range', 'start_date'),
-            Input('date-range', 'end_date'),
-            Input('clientTypeList', 'value')
-        ]
-    )(create_callback(index))
+        [Output(item + suffix_sparkline_graph, 'figure') for item in params[1:]],
+        sparkline_inputs,
+        background=True,
+        manager=background_manager,
+        progress=[Output('sparkline-progress', 'value'), Output('sparkline-progress', 'max')],
+        running=[(Output('sparkline-progress', 'style'), {"visibility": "visible", "width": "100%"},
+                  {"visibility": "hidden", "width": "100%"})],
+        # Changed filters terminate the job they replace; so does leaving the tab
+        cancel=[Input('app-tabs', 'value')],
+        interval=BACKGROUND_POLL_MS,
+    )(update_sparklines_in_background)
+elif SPARKLINE_MODE == "per-row":
+    for index in range(1, len(params)):
+        item = params[index]
+        sparkline_graph_id = item + suffix_sparkline_graph
+        app.callback(
+            Output(sparkline_graph_id, 'figure'),
+            sparkline_inputs
+        )(create_callback(index))
+else:
+    app.callback(
+        [Output(item + suffix_sparkline_graph, 'figure') for item in params[1:]],
+        sparkline_inputs
+    )(update_sparklines)
+
+@app.callback(
+    [Output(item + suffix_sd_n, 'children') for item in params[1:]]
+    + [Output(item + suffix_sd_g, 'value') for item in params[1:]],
+    sparkline_inputs
+)
+@result_cache.memoize()
+def update_deviation_cells(sourceList, orderTypeList, start_date, end_date, clientTypeList):
+    """
+    Fill every metric row's 1SD percentage and 2SD bar from rolling statistics of its daily counts.
+    """
+    cubes = snapshots.current().cubes
+    selections = [sourceList, orderTypeList, clientTypeList]
+    percents = []
+    bars = []
+    for item in params[1:]:
+        over_1sd, over_2sd = deviation_summary(
+            cubes[item], start_date, end_date, selections, window=ROLLING_WINDOW_DAYS
+        )
+        percents.append("{:.2f}%".format(over_1sd))
+        bars.append(min(round(float(over_2sd), 2), SD_BAR_MAX))
+    return percents + bars
 
 def generate_section_banner(title):
     return html.Div(className="section-banner", children=title)
@@ -656,36 +944,120 @@ def build_chart_panel():
             generate_section_banner("Dive Down Chart"),
             dcc.Graph(
                 id="dive-down-chart",
-                figure=go.Figure(
-                    {
-                        "data":[
-                            {
-                                "x":[],
-                                "y":[],
-                                "mode": "lines+markers",
-                                "name": params[1],
-                            }
-                        ],
-                        "layout": {
-                            "paper_bgcolor": "rgba(0,0,0,0)",
-                            "plot_bgcolor": "rgba(0,0,0,0)",
-                            "xaxis": dict(
-                                showline=False, showgrid=False, zeroline=False
-                            ),
-                            "yaxis": dict(
-                                showgrid=False, showline=False,zeroline=False
-                            ),
-                            "autosize":True
-                        },
-                    }
-                ),
+                figure={
+                    "data":[
+                        {
+                            "x":[],
+                            "y":[],
+                            "mode": "lines+markers",
+                            "name": params[1],
+                        }
+                    ],
+                    "layout": {
+                        "paper_bgcolor": "rgba(0,0,0,0)",
+                        "plot_bgcolor": "rgba(0,0,0,0)",
+                        "xaxis": dict(
+                            showline=False, showgrid=False, zeroline=False
+                        ),
+                        "yaxis": dict(
+                            showgrid=False, showline=False,zeroline=False
+                        ),
+                        "autosize":True
+                    },
+                },
             ),
+            build_drilldown_table(),
         ],
     )
 
-def generate_graph(data,col):
-    stats_df=filter_df(data)
-    col_data = data["Count"]
+def build_drilldown_table():
+    return dash_table.DataTable(
+        id="drilldown-table",
+        # Filled by update_drilldown_columns once the data is loaded
+        columns=[],
+        page_current=0,
+        page_size=DRILLDOWN_PAGE_SIZE,
+        # Paging, sorting and filtering run in update_drilldown_table
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        style_table={"overflowX": "auto"},
+        style_header={"backgroundColor": "#1e2130", "color": "white", "fontWeight": "bold"},
+        style_filter={"backgroundColor": "#161a28", "color": "white"},
+        style_cell={"backgroundColor": "#161a28", "color": "white", "border": "1px solid #2e3444",
+                    "textAlign": "left", "minWidth": "90px"},
+    )
+
+@app.callback(
+    Output("drilldown-table", "columns"),
+    [Input("app-tabs", "value")],
+)
+def update_drilldown_columns(tab_switch):
+    return table_columns(snapshots.current().orders)
+
+@result_cache.memoize()
+def generate_graph(col, sourceList, orderTypeList, start_date, end_date, clientTypeList):
+    """
+    Build the control chart figure for one metric: daily counts, center line, +/- 1, 2 and 3 SD
+    bands and the days beyond 3 SD.
+    """
+    data = snapshots.current()
+    selections = [sourceList, orderTypeList, clientTypeList]
+    # Without segmentation the limits were computed when the data loaded
+    limits = data.control_limits[col] if not any(selections) else None
+    days, values, mean, std, out_of_control = control_chart(
+        data.cubes[col], start_date, end_date, selections, limits
+    )
+
+    x_range = days[[0, -1]] if len(days) else days
+    # Limits stay daily; only the drawn line is thinned, keeping every out of control day
+    shown = decimate(days, values, CHART_MAX_POINTS, keep=np.flatnonzero(out_of_control))
+    traces = [
+        scatter(days[shown], values[shown], mode="lines+markers", name=col, line={"color": "#f4d44d"}),
+        scatter(
+            x_range,
+            np.full(len(x_range), mean),
+            mode="lines",
+            name="Mean",
+            line={"color": "white", "width": 1},
+        ),
+    ]
+    for sd, color, dash_style in ((1, "#92e0d3", "dot"), (2, "#f4d44d", "dash"), (3, "#f45060", "solid")):
+        for sign in (1, -1):
+            traces.append(
+                scatter(
+                    x_range,
+                    np.full(len(x_range), mean + sign * sd * std),
+                    mode="lines",
+                    name="{}{}SD".format("+" if sign > 0 else "-", sd),
+                    line={"color": color, "width": 1, "dash": dash_style},
+                    showlegend=sign > 0,
+                )
+            )
+    traces.append(
+        scatter(
+            days[out_of_control],
+            values[out_of_control],
+            mode="markers",
+            name="Out of control",
+            marker={"color": "#f45060", "size": 10, "symbol": "circle-open", "line": {"width": 2}},
+        )
+    )
+    return {
+        "data": traces,
+        "layout": {
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "font": {"color": "white"},
+            "xaxis": dict(type="date", showline=False, showgrid=False, zeroline=False),
+            "yaxis": dict(showgrid=False, showline=False, zeroline=False),
+            "legend": {"orientation": "h"},
+            "autosize": True,
+        },
+    }
 
 @app.callback(
         output=Output("dive-down-chart", "figure"),
@@ -694,29 +1066,136 @@ def generate_graph(data,col):
             Input(params[2] + suffix_button_id, "n_clicks"),
             Input(params[3] + suffix_button_id, "n_clicks"),
             Input(params[4] + suffix_button_id, "n_clicks"),
-        ],
+        ] + sparkline_inputs,
+        state=[State("dive-down-chart", "figure")],
 )
-def update_control_chart(n1,n2,n3,n4,data,cur_fig):
+def update_control_chart(n1, n2, n3, n4, sourceList, orderTypeList, start_date, end_date, clientTypeList, cur_fig):
     ctx = dash.callback_context
+    filters = (sourceList, orderTypeList, start_date, end_date, clientTypeList)
+
+    # Keep the metric on display unless one of the metric buttons was clicked
+    curr_id = params[1]
+    if cur_fig and cur_fig.get("data"):
+        curr_id = cur_fig["data"][0].get("name", curr_id)
+    if curr_id not in params[1:]:
+        curr_id = params[1]
 
-    if not ctx.triggered:
-        return generate_graph(data,params[1])
     if ctx.triggered:
-        splitted = ctx.triggered[0]["prop_id"].split(".")
-        prop_id = splitted[0]
-        prop_type = splitted[1]
-
-        if prop_type == "n_clicks":
-            curr_id = cur_fig["data"][0]["name"]
-            prop_id = prop_id[:-4]
-            if curr_id == prop_id:
-                return generate_graph(data,curr_id)
-            else:
-                return generate_graph(data,prop_id)
-        if prop_type == "n_intervals" and cur_fig is not None:
-            curr_id = cur_fig["data"][0]["name"]
-            return generate_graph(data, curr_id)
-        
+        prop_id, prop_type = ctx.triggered[0]["prop_id"].rsplit(".", 1)
+        if prop_type == "n_clicks" and prop_id.endswith(suffix_button_id):
+            curr_id = prop_id[:-len(suffix_button_id)]
+    return generate_graph(curr_id, *filters)
+
+def drilldown_rows(data, sourceList, orderTypeList, start_date, end_date, clientTypeList, filter_query, sort_key):
+    """
+    Row positions in data's orders passing the dropdowns, the date range and the table's
+    column filters, in the table's sort order.
+    """
+    key = ("drilldown_rows", data.version) + normalize_filters(
+        sourceList, orderTypeList, start_date, end_date, clientTypeList, filter_query, sort_key
+    )
+    rows = row_cache.get(key)
+    if rows is not None:
+        count_cache_hit()
+        return rows
+    selections = {
+        'Referral Source': sourceList,
+        'Order Type': orderTypeList,
+        'Client Type': clientTypeList,
+    }
+    start, stop, rows = order_rows(data, selections, start_date, end_date)
+    if rows is None:
+        rows = np.arange(start, stop)
+    count_rows(len(rows))
+    rows = filter_rows(data.orders, rows, parse_filter_query(filter_query))
+    sort_by = [dict(zip(("column_id", "direction"), entry.rsplit(":", 1))) for entry in sort_key.split("|") if entry]
+    rows = sort_rows(data.orders, rows, sort_by)
+    row_cache.set(key, rows, size=rows.nbytes)
+    return rows
+
+@app.callback(
+    [
+        Output("drilldown-table", "data"),
+        Output("drilldown-table", "page_count"),
+        Output("drilldown-table", "page_current"),
+    ],
+    sparkline_inputs + [
+        Input("drilldown-table", "page_current"),
+        Input("drilldown-table", "page_size"),
+        Input("drilldown-table", "sort_by"),
+        Input("drilldown-table", "filter_query"),
+    ],
+)
+def update_drilldown_table(sourceList, orderTypeList, start_date, end_date, clientTypeList,
+                           page_current, page_size, sort_by, filter_query):
+    """
+    Send only the visible page of the filtered and sorted orders.
+    """
+    # A string, so the cache key keeps the sort priority
+    sort_key = "|".join("{}:{}".format(entry["column_id"], entry.get("direction", "asc")) for entry in sort_by or [])
+    # One snapshot for the positions and the page they index, as a reload may swap in another
+    data = snapshots.current()
+    rows = drilldown_rows(
+        data, sourceList, orderTypeList, start_date, end_date, clientTypeList, filter_query or "", sort_key
+    )
+    page_size = page_size or DRILLDOWN_PAGE_SIZE
+    page_count = max(1, -(-len(rows) // page_size))
+    # Any change but paging starts again from the first page
+    if "drilldown-table.page_current" not in dash.callback_context.triggered_prop_ids:
+        page_current = 0
+    page_current = min(page_current or 0, page_count - 1)
+    return page_records(data.orders, rows, page_current, page_size), page_count, page_current
+
+# The export links carry the current segmentation in their query string
+app.clientside_callback(
+    ClientsideFunction(namespace="remede", function_name="export_links"),
+    [Output("export-csv-link", "href"), Output("export-parquet-link", "href")],
+    sparkline_inputs,
+    [State("export-csv-link", "href"), State("export-parquet-link", "href")],
+)
+
+def build_active_panel():
+    return html.Div(
+        id="active-placements-container",
+        className="twelve columns",
+        children=[
+            generate_section_banner("Active Placements"),
+            dcc.Graph(id="active-placements-chart"),
+        ],
+    )
+
+@app.callback(
+    [Output("active-placements-chart", "figure"), Output("active-led", "value")],
+    sparkline_inputs,
+)
+@result_cache.memoize()
+def update_active_placements(sourceList, orderTypeList, start_date, end_date, clientTypeList):
+    """
+    Chart the orders active on each day of the range, and show the count on its last day.
+    """
+    cubes = snapshots.current().cubes
+    days, values = active_placements(
+        cubes['Placement Starts'], cubes['Placement Ends'], start_date, end_date,
+        [sourceList, orderTypeList, clientTypeList],
+    )
+    # A level, not a count per day, so long ranges are thinned rather than summed
+    shown = decimate(days, values, CHART_MAX_POINTS)
+    figure = {
+        "data": [
+            scatter(days[shown], values[shown], mode="lines", name="Active placements",
+                    line={"color": "#92e0d3"}, fill="tozeroy")
+        ],
+        "layout": {
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "font": {"color": "white"},
+            "xaxis": dict(type="date", showline=False, showgrid=False, zeroline=False),
+            "yaxis": dict(showgrid=False, showline=False, zeroline=False),
+            "autosize": True,
+        },
+    }
+    return figure, int(values[-1]) if len(values) else 0
+
 @app.callback(
     [Output("app-content", "children")],
     [Input("app-tabs", "value")],
@@ -731,27 +1210,37 @@ def render_tab_content(tab_switch):
                 build_quick_stats_panel(),
                 html.Div(
                     id="graphs-container",
-                    children=[build_top_panel(),build_chart_panel(),build_segment_panel()],
+                    children=[build_top_panel(),build_chart_panel(),build_active_panel(),build_segment_panel()],
                 ),
             ],
         ),
     )
 
-app.layout = html.Div(
-    id="big-app-container",
-    children=[
-        build_banner(),
-        html.Div(
-            id="app-container",
-            children=[
-                build_tabs(),
-                # Main app
-                html.Div(id="app-content")
-            ],
-        ),
-        generate_modal(),
-    ],
-)
+def serve_layout():
+    # Needs no data, so the first paint never waits on the load; callbacks fill it in
+    return html.Div(
+        id="big-app-container",
+        children=[
+            build_banner(),
+            html.Div(
+                id="app-container",
+                children=[
+                    build_tabs(),
+                    # Main app
+                    html.Div(id="app-content")
+                ],
+            ),
+            generate_modal(),
+        ] + ([dcc.Store(id="daily-count-store")] if CLIENTSIDE_FILTERS else []),
+    )
+
+app.layout = serve_layout
+
+# Every callback is registered by now
+if METRICS_ENABLED:
+    metrics = Metrics()
+    metrics.instrument_callbacks(app)
+    metrics.install(server)
 
 
 
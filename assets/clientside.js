@@ -0,0 +1,266 @@
+// Browser side callbacks: the modal toggle, the export links, and with REMEDE_CLIENTSIDE_FILTERS=1
+// the sparklines and piechart, recomputed from the daily count table shipped once in the daily-count-store.
+
+var DAY_MS = 86400000;
+
+var TYPED_ARRAYS = {
+    i1: Int8Array, u1: Uint8Array,
+    i2: Int16Array, u2: Uint16Array,
+    i4: Int32Array, u4: Uint32Array,
+    f4: Float32Array, f8: Float64Array
+};
+
+// Decode a plotly typed array spec ({dtype, bdata}) sent by figures.typed_array
+function decodeTyped(spec) {
+    var binary = atob(spec.bdata);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    var Type = TYPED_ARRAYS[spec.dtype];
+    return new Type(bytes.buffer, 0, bytes.length / Type.BYTES_PER_ELEMENT);
+}
+
+// DatePickerRange values are ISO dates, possibly with a time part
+function toDay(value) {
+    if (!value) {
+        return null;
+    }
+    var parts = value.slice(0, 10).split("-");
+    return Date.UTC(+parts[0], +parts[1] - 1, +parts[2]) / DAY_MS;
+}
+
+// The table is decoded once per data version
+var decodedTable = null;
+var decodedVersion = null;
+
+function decodeTable(table) {
+    if (decodedTable !== null && decodedVersion === table.version) {
+        return decodedTable;
+    }
+    var decode = function (cells) {
+        return {
+            day: decodeTyped(cells.day),
+            codes: cells.codes.map(decodeTyped),
+            count: decodeTyped(cells.count)
+        };
+    };
+    decodedTable = {
+        metrics: table.metrics.map(function (metric) { return decode(metric.cells); }),
+        specialty: decode(table.specialty.cells)
+    };
+    decodedVersion = table.version;
+    return decodedTable;
+}
+
+// Which codes of each dimension pass the selection; null leaves the dimension unfiltered
+function selectedCodes(labels, selected) {
+    if (!labels || !selected || !selected.length) {
+        return null;
+    }
+    var allowed = {};
+    selected.forEach(function (value) {
+        var code = labels.indexOf(value);
+        if (code >= 0) {
+            allowed[code] = true;
+        }
+    });
+    return allowed;
+}
+
+// Sum the cells in [start, end] that pass every dimension filter, by day
+function filteredSeries(cells, filters, start, end) {
+    var totals = {};
+    for (var i = 0; i < cells.day.length; i++) {
+        var day = cells.day[i];
+        if ((start !== null && day < start) || (end !== null && day > end)) {
+            continue;
+        }
+        var keep = true;
+        for (var d = 0; d < filters.length && keep; d++) {
+            keep = filters[d] === null || filters[d][cells.codes[d][i]] === true;
+        }
+        if (keep) {
+            totals[day] = (totals[day] || 0) + cells.count[i];
+        }
+    }
+    var days = Object.keys(totals).map(Number).sort(function (a, b) { return a - b; });
+    return {days: days, values: days.map(function (day) { return totals[day]; })};
+}
+
+// Sum a daily series into buckets; bucketOf maps a day to its bucket's first day
+function rollup(series, bucketOf) {
+    var days = [];
+    var values = [];
+    for (var i = 0; i < series.days.length; i++) {
+        var bucket = bucketOf(series.days[i]);
+        if (days.length && days[days.length - 1] === bucket) {
+            values[values.length - 1] += series.values[i];
+        } else {
+            days.push(bucket);
+            values.push(series.values[i]);
+        }
+    }
+    // The first bucket is labelled by the series' first day, so it never starts before the range
+    if (days.length) {
+        days[0] = Math.max(days[0], series.days[0]);
+    }
+    return {days: days, values: values};
+}
+
+function weekOf(day) {
+    // ISO weeks, Monday to Sunday, as downsample.buckets; day 0 (1970-01-01) is a Thursday
+    return Math.floor((day + 3) / 7) * 7 - 3;
+}
+
+function monthOf(day) {
+    var date = new Date(day * DAY_MS);
+    return Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), 1) / DAY_MS;
+}
+
+function monthIndex(day) {
+    var date = new Date(day * DAY_MS);
+    return date.getUTCFullYear() * 12 + date.getUTCMonth();
+}
+
+// Largest-Triangle-Three-Buckets, as downsample.lttb
+function lttb(series, threshold) {
+    var n = series.days.length;
+    if (threshold >= n || threshold < 3) {
+        return series;
+    }
+    var x = series.days;
+    var y = series.values;
+    var edges = [];
+    for (var e = 0; e < threshold - 1; e++) {
+        edges.push(Math.floor(1 + e * (n - 2) / (threshold - 2)));
+    }
+    edges.push(n);
+    var picked = [0];
+    var a = 0;
+    for (var i = 0; i < threshold - 2; i++) {
+        var start = edges[i], stop = edges[i + 1], nextStop = edges[i + 2];
+        var meanX = 0, meanY = 0;
+        for (var j = stop; j < nextStop; j++) {
+            meanX += x[j];
+            meanY += y[j];
+        }
+        meanX /= nextStop - stop;
+        meanY /= nextStop - stop;
+        var best = start, bestArea = -1;
+        for (var k = start; k < stop; k++) {
+            var area = Math.abs((x[a] - meanX) * (y[k] - y[a]) - (x[a] - x[k]) * (meanY - y[a]));
+            if (area > bestArea) {
+                best = k;
+                bestArea = area;
+            }
+        }
+        a = best;
+        picked.push(a);
+    }
+    picked.push(n - 1);
+    return {
+        days: picked.map(function (p) { return x[p]; }),
+        values: picked.map(function (p) { return y[p]; })
+    };
+}
+
+// Fit a series into maxPoints as downsample.rollup_series does
+function rollupSeries(series, maxPoints) {
+    var n = series.days.length;
+    if (n <= maxPoints) {
+        return {series: series, unit: "day"};
+    }
+    var first = series.days[0], last = series.days[n - 1];
+    if ((weekOf(last) - weekOf(first)) / 7 + 1 <= maxPoints) {
+        return {series: rollup(series, weekOf), unit: "week"};
+    }
+    var months = rollup(series, monthOf);
+    if (monthIndex(last) - monthIndex(first) + 1 <= maxPoints) {
+        return {series: months, unit: "month"};
+    }
+    return {series: lttb(months, maxPoints), unit: "month"};
+}
+
+// Query string of the export endpoint, as read by app.export_orders
+function exportQuery(sourceList, orderTypeList, start_date, end_date, clientTypeList) {
+    var params = new URLSearchParams();
+    var lists = {sourceList: sourceList, orderTypeList: orderTypeList, clientTypeList: clientTypeList};
+    Object.keys(lists).forEach(function (name) {
+        (lists[name] || []).forEach(function (value) { params.append(name, value); });
+    });
+    if (start_date) {
+        params.append("start_date", start_date.slice(0, 10));
+    }
+    if (end_date) {
+        params.append("end_date", end_date.slice(0, 10));
+    }
+    var query = params.toString();
+    return query ? "?" + query : "";
+}
+
+function copy(value) {
+    return JSON.parse(JSON.stringify(value));
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    remede: {
+        toggle_modal: function (open_clicks, close_clicks) {
+            var triggered = dash_clientside.callback_context.triggered;
+            if (triggered.length && triggered[0].prop_id === "learn-more-button.n_clicks") {
+                return {display: "block"};
+            }
+            return {display: "none"};
+        },
+
+        export_links: function (sourceList, orderTypeList, start_date, end_date, clientTypeList, csv_href, parquet_href) {
+            var query = exportQuery(sourceList, orderTypeList, start_date, end_date, clientTypeList);
+            return [csv_href.split("?")[0] + query, parquet_href.split("?")[0] + query];
+        },
+
+        sparklines: function (sourceList, orderTypeList, start_date, end_date, clientTypeList, table) {
+            if (!table) {
+                return dash_clientside.no_update;
+            }
+            var decoded = decodeTable(table);
+            var start = toDay(start_date), end = toDay(end_date);
+            var selections = [sourceList, orderTypeList, clientTypeList];
+            return table.metrics.map(function (metric, index) {
+                var filters = metric.dimensions.map(function (labels, d) {
+                    return selectedCodes(labels, selections[d]);
+                });
+                var fitted = rollupSeries(filteredSeries(decoded.metrics[index], filters, start, end), table.max_points);
+                var figure = copy(table.sparkline);
+                var trace = figure.data[0];
+                delete trace.x0;
+                delete trace.dx;
+                trace.x = fitted.series.days.map(function (day) { return day * DAY_MS; });
+                trace.y = fitted.series.values;
+                trace.name = fitted.unit === "day" ? "Order count" : "Order count per " + fitted.unit;
+                return figure;
+            });
+        },
+
+        piechart: function (start_date, end_date, table) {
+            if (!table) {
+                return dash_clientside.no_update;
+            }
+            var decoded = decodeTable(table);
+            var totals = {};
+            var cells = decoded.specialty;
+            var start = toDay(start_date), end = toDay(end_date);
+            for (var i = 0; i < cells.day.length; i++) {
+                if ((start !== null && cells.day[i] < start) || (end !== null && cells.day[i] > end)) {
+                    continue;
+                }
+                totals[cells.codes[0][i]] = (totals[cells.codes[0][i]] || 0) + cells.count[i];
+            }
+            // Largest first, as pandas value_counts
+            var codes = Object.keys(totals).sort(function (a, b) { return totals[b] - totals[a]; });
+            var figure = copy(table.piechart);
+            figure.data[0].labels = codes.map(function (code) { return table.specialty.labels[code]; });
+            figure.data[0].values = codes.map(function (code) { return totals[code]; });
+            return figure;
+        }
+    }
+});
@@ -0,0 +1,110 @@
+"""
+Compare building and serializing callback figures through plotly graph_objs and the json
+encoder against plain dicts with base64 typed arrays and orjson.
+
+    python benchmarks/bench_figures.py [n_orders]
+
+Generates synthetic exports (200k orders by default), loads the app on them and reports
+response bytes and CPU time per callback for a one month, a two year and the full range.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import plotly.graph_objs as go
+from plotly.io.json import to_json_plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate  # noqa: E402
+
+
+RANGES = (("1 month", "2019-01-01", "2019-01-31"), ("2 years", "2017-01-01", "2018-12-31"), ("all", None, None))
+REPEAT = 20
+
+
+def graph_objs_sparklines(app, start_date, end_date, layout):
+    # The sparkline path before the fast figures: a validated go.Scatter per row
+    cubes = app.snapshots.current().cubes
+    figures = []
+    for item in app.params[1:]:
+        dates, counts = cubes[item].series(start_date, end_date, [None, None, None])
+        dates, counts, _ = app.rollup_series(dates, counts, app.SPARKLINE_MAX_POINTS)
+        trace = go.Scatter(x=dates, y=counts, mode='lines+markers', name='Order count', line=dict(color='#f4d44d'))
+        figures.append({"data": [trace], "layout": layout})
+    return figures
+
+
+def graph_objs_chart(app, start_date, end_date, layout):
+    # The control chart before the fast figures: numpy arrays encoded as json date strings and numbers
+    data = app.snapshots.current()
+    col = app.params[1]
+    days, values, mean, std, out_of_control = app.control_chart(
+        data.cubes[col], start_date, end_date, [None, None, None], data.control_limits[col]
+    )
+    x_range = [days[0], days[-1]]
+    shown = app.decimate(days, values, app.CHART_MAX_POINTS, keep=app.np.flatnonzero(out_of_control))
+    traces = [
+        {"x": days[shown], "y": values[shown], "mode": "lines+markers", "name": col, "line": {"color": "#f4d44d"}},
+        {"x": x_range, "y": [mean] * 2, "mode": "lines", "name": "Mean", "line": {"color": "white", "width": 1}},
+    ]
+    for sd, color, dash_style in ((1, "#92e0d3", "dot"), (2, "#f4d44d", "dash"), (3, "#f45060", "solid")):
+        for sign in (1, -1):
+            traces.append({
+                "x": x_range,
+                "y": [mean + sign * sd * std] * 2,
+                "mode": "lines",
+                "name": "{}{}SD".format("+" if sign > 0 else "-", sd),
+                "line": {"color": color, "width": 1, "dash": dash_style},
+                "showlegend": sign > 0,
+            })
+    traces.append({
+        "x": days[out_of_control],
+        "y": values[out_of_control],
+        "mode": "markers",
+        "name": "Out of control",
+        "marker": {"color": "#f45060", "size": 10, "symbol": "circle-open", "line": {"width": 2}},
+    })
+    return {"data": traces, "layout": layout}
+
+
+def measure(build, engine):
+    started = time.process_time()
+    for _ in range(REPEAT):
+        payload = to_json_plotly(build(), engine=engine)
+    return len(payload), (time.process_time() - started) / REPEAT
+
+
+def main(n_orders):
+    with tempfile.TemporaryDirectory() as data_path:
+        print("Generating {:,} orders".format(n_orders))
+        generate(n_orders, data_path)
+        os.environ["REMEDE_DATA_PATH"] = data_path
+        os.environ["REMEDE_DATA_RELOAD_INTERVAL"] = "0"
+        import app
+
+        # Both paths share the same layouts, so only the traces differ
+        sparkline_layout = app.update_sparklines.__wrapped__(None, None, None, None, None)[0]["layout"]
+        chart_layout = app.generate_graph.__wrapped__(app.params[1], None, None, None, None, None)["layout"]
+
+        print("{:<10} {:<11} {:<22} {:>10} {:>10}".format("range", "callback", "path", "bytes", "cpu ms"))
+        for label, start_date, end_date in RANGES:
+            filters = (None, None, start_date, end_date, None)
+            cases = (
+                ("sparklines", "graph_objs + json",
+                 lambda: graph_objs_sparklines(app, start_date, end_date, sparkline_layout), "json"),
+                ("sparklines", "typed arrays + orjson",
+                 lambda: app.update_sparklines.__wrapped__(*filters), "orjson"),
+                ("chart", "graph_objs + json",
+                 lambda: graph_objs_chart(app, start_date, end_date, chart_layout), "json"),
+                ("chart", "typed arrays + orjson",
+                 lambda: app.generate_graph.__wrapped__(app.params[1], *filters), "orjson"),
+            )
+            for callback, path, build, engine in cases:
+                size, cpu = measure(build, engine)
+                print("{:<10} {:<11} {:<22} {:>10,} {:>10.2f}".format(label, callback, path, size, cpu * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
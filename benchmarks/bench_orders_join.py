@@ -0,0 +1,77 @@
+"""
+Compare enriching orders with three merges against the single lookup join.
+
+    python benchmarks/bench_orders_join.py [n_orders]
+
+Generates synthetic exports (1M orders by default), then times each variant and
+records the peak memory it allocates with tracemalloc.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_loader  # noqa: E402
+from synthetic import generate  # noqa: E402
+
+
+def merge_orders(orders, temps, clients):
+    # The enrichment step before the lookup join
+    orders = orders.merge(temps[['Temp ID', 'Referral Source']], on="Temp ID", how="left")
+    orders = orders.merge(clients[['Client ID', 'Master Client']], on="Client ID", how="left")
+    orders = orders.merge(clients[['Client ID', 'Date/Time Created']], on='Client ID', how='left')
+    return orders
+
+
+def lookup_orders(orders, temps, clients):
+    return data_loader.join_orders(orders.copy(deep=False), data_loader.order_lookups(temps, clients))
+
+
+def read_inputs(data_path):
+    temps = pd.read_csv(os.path.join(data_path, data_loader.TEMPS_FILE), dtype=data_loader.data_types)
+    clients = pd.read_csv(os.path.join(data_path, data_loader.CLIENTS_FILE), dtype=data_loader.data_types)
+    orders = data_loader.read_orders(os.path.join(data_path, data_loader.ORDERS_FILE))
+    frames = (orders, temps, clients)
+    data_loader.apply_schema(frames, data_loader.shared_categories(frames))
+    return orders, temps, clients
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(n_orders):
+    with tempfile.TemporaryDirectory() as data_path:
+        print("Generating {:,} orders".format(n_orders))
+        generate(n_orders, data_path)
+        orders, temps, clients = read_inputs(data_path)
+
+        results = {}
+        for name, func in (("merge x3", merge_orders), ("lookup join", lookup_orders)):
+            result, elapsed, peak = measure(func, orders, temps, clients)
+            results[name] = result
+            print("{:<12} {:8.3f}s  peak {:8.1f} MB".format(name, elapsed, peak / 2 ** 20))
+
+        merged, joined = results["merge x3"], results["lookup join"]
+        for column in ('Referral Source', 'Master Client', 'Date/Time Created'):
+            assert merged[column].astype(object).fillna("").equals(joined[column].astype(object).fillna("")), column
+
+        # tracemalloc slows the csv parser badly, so the full load is only timed
+        started = time.perf_counter()
+        data_loader.read_exports(data_path)
+        print("{:<12} {:8.3f}s".format("full load", time.perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
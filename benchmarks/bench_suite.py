@@ -0,0 +1,238 @@
+"""
+Time module load, every callback called directly and every callback over HTTP on synthetic
+exports, and compare the results with a stored baseline.
+
+    python benchmarks/bench_suite.py [--scales 10k 100k] [--save-baseline] [--tolerance 1.25]
+
+Each scale runs in a fresh interpreter, so module import is timed alone and the data load
+cold (csv parse) and warm (feather cache). Results slower than the baseline by more than the tolerance, and by more
+than a millisecond, are reported as regressions and make the exit status non-zero.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import generate, parse_scale  # noqa: E402
+
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Filter states every callback is timed with: sourceList, orderTypeList, start, end, clientTypeList
+FILTER_STATES = {
+    "month": (None, None, "2019-01-01", "2019-01-31", None),
+    "all": (None, None, None, None, None),
+    "segmented": (["Indeed", "Website"], ["Travel"], "2017-01-01", "2018-12-31", ["Hospital"]),
+}
+
+# Differences below this many seconds are noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.001
+
+
+def median_time(func, repeat):
+    """
+    Return the median wall time of repeat calls.
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def direct_cases(app, state):
+    """
+    Return (name, call) for every callback body, bypassing the result cache.
+    """
+    filters = FILTER_STATES[state]
+    start_date, end_date = filters[2], filters[3]
+    cases = [
+        ("filter_df", lambda: app.filter_df(app.snapshots.current().orders, *filters)),
+        ("update_piechart", lambda: app.update_piechart.__wrapped__(start_date, end_date)),
+        ("update_quick_stats", lambda: app.update_quick_stats.__wrapped__(start_date, end_date)),
+        ("update_sparklines", lambda: app.update_sparklines.__wrapped__(*filters)),
+        ("update_deviation_cells", lambda: app.update_deviation_cells.__wrapped__(*filters)),
+        ("generate_graph", lambda: app.generate_graph.__wrapped__(app.params[1], *filters)),
+        ("drilldown_rows", lambda: (
+            app.row_cache.clear(),
+            app.drilldown_rows(app.snapshots.current(), *filters, "", "End Date:desc"),
+        )),
+    ]
+    for index in range(1, len(app.params)):
+        per_row = app.create_callback(index).__wrapped__
+        cases.append(("sparkline:" + app.params[index], lambda per_row=per_row: per_row(*filters)))
+    return cases
+
+
+def request_body(app, key, state):
+    """
+    Build a /_dash-update-component request for a registered callback under a filter state.
+    """
+    source, order_type, start_date, end_date, client_type = FILTER_STATES[state]
+    values = {
+        ("sourceList", "value"): source,
+        ("orderTypeList", "value"): order_type,
+        ("date-range", "start_date"): start_date,
+        ("date-range", "end_date"): end_date,
+        ("clientTypeList", "value"): client_type,
+        ("app-tabs", "value"): "tab2",
+    }
+    entry = app.app.callback_map[key]
+
+    def fill(dependencies):
+        return [dict(dependency, value=values.get((dependency["id"], dependency["property"])))
+                for dependency in dependencies]
+
+    outputs = [dict(zip(("id", "property"), output.rsplit(".", 1)))
+               for output in key.strip(".").split("...")]
+    return {
+        "output": key,
+        "outputs": outputs if key.startswith("..") else outputs[0],
+        "inputs": fill(entry["inputs"]),
+        "state": fill(entry["state"]),
+        "changedPropIds": [],
+    }
+
+
+def run_worker(data_path, result_path, repeat):
+    """
+    Load the app on data_path and write every timing to result_path as json.
+    """
+    os.environ["REMEDE_DATA_PATH"] = data_path
+    os.environ["REMEDE_DATA_RELOAD_INTERVAL"] = "0"
+    results = {}
+
+    started = time.perf_counter()
+    import app
+    results["import"] = time.perf_counter() - started
+    app.preload_data()
+    results["load"] = time.perf_counter() - started
+
+    for state in FILTER_STATES:
+        for name, call in direct_cases(app, state):
+            results["direct/{}/{}".format(name, state)] = median_time(call, repeat)
+
+    client = app.server.test_client()
+    for key, entry in app.app.callback_map.items():
+        if "callback" not in entry:
+            continue
+        name = getattr(entry["callback"], "__name__", key)
+        if name == "callback":
+            name = "sparkline:" + key.split("_sparkline_graph")[0]
+        for state in FILTER_STATES:
+            body = request_body(app, key, state)
+
+            def post():
+                # Every request computes its result instead of reading the result cache
+                app.result_cache.clear()
+                app.row_cache.clear()
+                response = client.post("/_dash-update-component", json=body)
+                assert response.status_code in (200, 204), (key, response.status_code)
+
+            results["http/{}/{}".format(name, state)] = median_time(post, repeat)
+
+    with open(result_path, "w") as result_file:
+        json.dump(results, result_file)
+
+
+def run_scale(n_orders, repeat, sparkline_mode):
+    """
+    Generate exports and time a cold and a warm start on them, each in a new interpreter.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as data_path:
+        started = time.perf_counter()
+        generate(n_orders, data_path)
+        print("  generated {:,} orders in {:.1f}s".format(n_orders, time.perf_counter() - started))
+        for start in ("cold", "warm"):
+            result_path = os.path.join(data_path, "result-{}.json".format(start))
+            env = dict(os.environ, REMEDE_SPARKLINE_MODE=sparkline_mode)
+            subprocess.run(
+                [sys.executable, "-W", "ignore", __file__, "--worker", data_path, result_path, "--repeat", str(repeat)],
+                check=True, env=env, stdout=subprocess.DEVNULL,
+            )
+            with open(result_path) as result_file:
+                timings = json.load(result_file)
+            if start == "cold":
+                # Only module load differs between a cold and a warm start
+                results["import"] = timings["import"]
+                results["load/cold"] = timings["load"]
+            else:
+                timings.pop("import")
+                timings["load/warm"] = timings.pop("load")
+                results.update(timings)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print every timing next to its baseline and return the regressions.
+    """
+    regressions = []
+    print("{:<58} {:>10} {:>10} {:>7}".format("benchmark", "baseline", "current", "ratio"))
+    for name in sorted(results):
+        current = results[name]
+        before = baseline.get(name)
+        if before is None:
+            print("{:<58} {:>10} {:>10.2f}ms".format(name, "-", current * 1000))
+            continue
+        ratio = current / before if before else float("inf")
+        regressed = ratio > tolerance and current - before > MIN_REGRESSION_SECONDS
+        print("{:<58} {:>8.2f}ms {:>8.2f}ms {:>6.2f}x{}".format(
+            name, before * 1000, current * 1000, ratio, "  REGRESSION" if regressed else ""
+        ))
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard on synthetic exports.")
+    parser.add_argument("--scales", nargs="+", default=["10k", "100k"], help="order counts, e.g. 10k 1M 10M")
+    parser.add_argument("--repeat", type=int, default=5, help="calls per timing, the median is kept")
+    parser.add_argument("--sparkline-mode", default="batched", choices=("batched", "per-row"))
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--worker", nargs=2, metavar=("DATA_PATH", "RESULT_PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.repeat)
+        return 0
+
+    results = {}
+    for scale in args.scales:
+        print("Scale {}".format(scale))
+        timings = run_scale(parse_scale(scale), args.repeat, args.sparkline_mode)
+        results.update({"{}/{}".format(scale, name): value for name, value in timings.items()})
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=1, sort_keys=True)
+        print("Saved baseline to {}".format(args.baseline))
+        return 0
+    if regressions:
+        print("{} regression(s) against {}".format(len(regressions), args.baseline))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Write synthetic temps, orders and clients exports with the same layout as the real ones.
+
+    python benchmarks/synthetic.py 1M /tmp/remede-data [--seed 0] [--skew 1.2]
+
+Scales from 10k to 10M orders; referral sources and client types follow a Zipf-like
+distribution so a few values dominate, as in the real exports.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import CLIENTS_FILE, ORDERS_FILE, TEMPS_FILE  # noqa: E402
+
+
+# Most common first; the skew decides how fast popularity falls off
+REFERRAL_SOURCES = ["Indeed", "Employee Referral", "Website", "Job Fair", "LinkedIn", "Facebook"]
+CLIENT_TYPES = ["Hospital", "School", "Clinic", "Long Term Care"]
+ORDER_TYPES = ["Per Diem", "Contract", "Travel"]
+SPECIALTIES = ["ICU", "ER", "Med Surg", "OR", "Pediatrics", "LPN"]
+
+
+# Orders are written in chunks of this many rows to bound memory at large scales
+CHUNK_ROWS = 1000000
+
+_SCALE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_scale(value):
+    """
+    Parse an order count such as 10000, 10k or 2.5M.
+    """
+    value = str(value).strip().lower()
+    if value[-1:] in _SCALE_SUFFIXES:
+        return int(float(value[:-1]) * _SCALE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def skewed_weights(n, skew):
+    """
+    Return Zipf-like probabilities for n ranked values, uniform when skew is 0.
+    """
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def generate(n_orders, data_path, seed=0, skew=1.2):
+    """
+    Write the three exports to data_path with n_orders orders, a temp per 10 orders
+    and a client per 50.
+    """
+    rng = np.random.default_rng(seed)
+    n_temps = max(n_orders // 10, 10)
+    n_clients = max(n_orders // 50, 10)
+    first = pd.Timestamp("2015-01-01")
+
+    temps_created = first + pd.to_timedelta(rng.integers(0, 3000 * 24 * 60, n_temps), unit="m")
+    sources = rng.choice(REFERRAL_SOURCES, n_temps, p=skewed_weights(len(REFERRAL_SOURCES), skew)).astype(object)
+    sources[rng.random(n_temps) < 0.05] = None
+    temps = pd.DataFrame({
+        "First Name": "First",
+        "Last Name": "Last",
+        "Certification": "RN",
+        "Specialty": rng.choice(SPECIALTIES, n_temps),
+        "Work Type": "Per Diem",
+        "Temp ID": np.arange(100000, 100000 + n_temps),
+        "Date/Time Created": temps_created.strftime("%m/%d/%Y %H:%M"),
+        "Date/Time Modified": temps_created.strftime("%m/%d/%Y %H:%M"),
+        "First Worked Date": "",
+        "Referral Source": sources,
+        "Referred By": "",
+    })
+
+    clients_created = first + pd.to_timedelta(rng.integers(0, 3000 * 24 * 60, n_clients), unit="m")
+    masters = rng.choice(["AMN", "Aya", "ShiftWise"], n_clients).astype(object)
+    masters[rng.random(n_clients) < 0.5] = None
+    client_types = rng.choice(CLIENT_TYPES, n_clients, p=skewed_weights(len(CLIENT_TYPES), skew))
+    clients = pd.DataFrame({
+        "Client ID": np.arange(1, n_clients + 1),
+        "Date/Time Created": clients_created.strftime("%m/%d/%Y %I:%M %p"),
+        "Status": "Active",
+        "Client Type": client_types,
+        "Contract Date": "",
+        "Referral Source": "",
+        "Referred By Name": "",
+        "Master Client": masters,
+    })
+
+    os.makedirs(data_path, exist_ok=True)
+    temps.to_csv(os.path.join(data_path, TEMPS_FILE), index=False)
+    clients.to_csv(os.path.join(data_path, CLIENTS_FILE), index=False)
+
+    orders_path = os.path.join(data_path, ORDERS_FILE)
+    for offset in range(0, n_orders, CHUNK_ROWS):
+        size = min(CHUNK_ROWS, n_orders - offset)
+        starts = first + pd.to_timedelta(rng.integers(0, 3000, size), unit="D")
+        ends = starts + pd.to_timedelta(rng.integers(0, 90, size), unit="D")
+        client_ids = rng.integers(1, n_clients + 1, size)
+        orders = pd.DataFrame({
+            "Order ID": np.arange(offset + 1, offset + size + 1),
+            "Start Date": starts.strftime("%m/%d/%Y"),
+            "End Date": ends.strftime("%m/%d/%Y"),
+            "Client ID": client_ids,
+            "Order Type": rng.choice(ORDER_TYPES, size),
+            "Order Specialty": rng.choice(SPECIALTIES, size),
+            "Client Name": "Client",
+            "Client Zip": "00000",
+            "Contact": "Contact",
+            "Temp ID": rng.integers(100000, 100000 + n_temps, size),
+            "Client Type": client_types[client_ids - 1],
+        })
+        orders.to_csv(orders_path, index=False, mode="w" if offset == 0 else "a", header=offset == 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic Remede exports.")
+    parser.add_argument("orders", type=parse_scale, help="number of orders, e.g. 10k, 1M or 10M")
+    parser.add_argument("data_path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.2, help="0 for uniform referral sources and client types")
+    args = parser.parse_args()
+    generate(args.orders, args.data_path, seed=args.seed, skew=args.skew)
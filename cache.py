@@ -0,0 +1,366 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import re
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import plotly.io as pio
+
+
+# DatePickerRange values may carry a time part; results only depend on the day
+_DATE_PREFIX = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def normalize_value(value):
+    """
+    Normalize one callback argument so equivalent filter states share a cache key.
+    """
+    if isinstance(value, (list, tuple, set, frozenset)):
+        # Selection order does not matter and an empty selection means no filter
+        return tuple(sorted(value, key=str)) or None
+    if isinstance(value, str):
+        match = _DATE_PREFIX.match(value)
+        if match:
+            return match.group(0)
+    return value
+
+
+def normalize_filters(*args):
+    return tuple(normalize_value(arg) for arg in args)
+
+
+def estimate_size(value):
+    """
+    Approximate the memory held by a cached result.
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count and approximate bytes.
+
+    Entries belong to a data version; when the version changes every entry is
+    dropped, so results never outlive the snapshot they were computed from.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=1024, version=None, shared=None, on_hit=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.version = version
+        # Optional cross-worker backend consulted on local misses
+        self.shared = shared
+        # Optional hook called with the memoized name on every local or shared hit
+        self.on_hit = on_hit
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self._entries and (self.bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def set_version(self, version):
+        """
+        Invalidate every entry if the underlying data snapshot changed.
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "evictions": self.evictions,
+            "version": self.version,
+        }
+
+    def memoize(self, name=None):
+        """
+        Decorate a callback body so results are reused for the same normalized filter state.
+        """
+        def decorator(func):
+            prefix = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args):
+                if self.version is None:
+                    # Data not loaded yet; a result cannot be tied to a version
+                    return func(*args)
+                key = (prefix, self.version) + normalize_filters(*args)
+                missing = object()
+                result = self.get(key, missing)
+                if result is not missing:
+                    if self.on_hit is not None:
+                        self.on_hit(prefix)
+                    return result
+                if self.shared is not None:
+                    shared_key = self.shared.make_key(key, self.version)
+                    result = self.shared.get(shared_key, missing)
+                    if result is not missing:
+                        self.shared_hits += 1
+                        self.set(key, result)
+                        if self.on_hit is not None:
+                            self.on_hit(prefix)
+                        return result
+                result = func(*args)
+                self.set(key, result)
+                if self.shared is not None:
+                    self.shared.set(shared_key, result)
+                return result
+            return wrapper
+        return decorator
+
+
+class RedisError(Exception):
+    pass
+
+
+class SharedCache:
+    """
+    Base for caches shared by every worker process.
+
+    Keys carry the dataset version, so workers that loaded different exports
+    never read each other's results, and entries expire after a TTL. Backend
+    errors are treated as misses; the cache must never fail a callback.
+
+    Results are stored as JSON, the form Dash sends them in anyway, so whoever
+    can write to the backend can plant data but never run code in a worker.
+    """
+
+    namespace = "remede"
+
+    def __init__(self, default_ttl=3600):
+        self.default_ttl = default_ttl
+
+    def make_key(self, key, version):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return "{}:{}:{}".format(self.namespace, version, digest)
+
+    def get(self, key, default=None):
+        try:
+            payload = self._get(key)
+        except (OSError, sqlite3.Error, RedisError):
+            return default
+        if payload is None:
+            return default
+        try:
+            return json.loads(payload)
+        except ValueError:
+            return default
+
+    def set(self, key, value, ttl=None):
+        try:
+            # Plotly's encoder also takes figures and numpy arrays and scalars
+            payload = pio.json.to_json_plotly(value).encode("utf-8")
+        except (TypeError, ValueError):
+            # Not representable as JSON; the result stays in the worker's own cache
+            return
+        try:
+            self._set(key, payload, ttl or self.default_ttl)
+        except (OSError, sqlite3.Error, RedisError):
+            pass
+
+
+class SQLiteCache(SharedCache):
+    """
+    Shared cache in a local SQLite file, for workers on one host.
+    """
+
+    # Expired rows are purged every this many writes
+    purge_interval = 256
+
+    def __init__(self, path, default_ttl=3600):
+        super().__init__(default_ttl)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, payload, ttl):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, payload, time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.purge_interval == 0:
+            connection.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+
+
+class RedisCache(SharedCache):
+    """
+    Shared cache speaking the Redis protocol (RESP) over a plain socket.
+
+    Works against Redis or any compatible server, including a local stand-in,
+    without a client library.
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, default_ttl=3600, timeout=1.0):
+        super().__init__(default_ttl)
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        try:
+            if self.password:
+                self._send("AUTH", self.password)
+            if self.db:
+                self._send("SELECT", self.db)
+        except (OSError, RedisError):
+            self._close()
+            raise
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _send(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._local.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise OSError("connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            raise RedisError(body.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError("unexpected reply {!r}".format(line))
+
+    def command(self, *args):
+        """
+        Send one command, reconnecting once if the connection went away.
+        """
+        for attempt in (0, 1):
+            try:
+                if getattr(self._local, "sock", None) is None:
+                    self._connect()
+                return self._send(*args)
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+
+    def _get(self, key):
+        return self.command("GET", key)
+
+    def _set(self, key, payload, ttl):
+        self.command("SET", key, payload, "EX", int(ttl))
+
+
+def shared_cache_from_url(url, default_ttl=3600):
+    """
+    Build a shared cache from sqlite:///path/to/file.db or redis://[:password@]host:port/db.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return SQLiteCache(parsed.path, default_ttl=default_ttl)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisCache(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=db,
+            password=parsed.password,
+            default_ttl=default_ttl,
+        )
+    raise ValueError("Unsupported shared cache url: {}".format(url))
@@ -0,0 +1,566 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - cache is optional
+    feather = None
+
+
+#### Source exports ####
+TEMPS_FILE = "temps23071901_50_00.csv"
+ORDERS_FILE = "orders23071903_56_57.csv"
+CLIENTS_FILE = "clients23071904_17_20.csv"
+SOURCE_FILES = (TEMPS_FILE, ORDERS_FILE, CLIENTS_FILE)
+
+# Cached frames live next to the exports in data/.cache
+CACHE_DIR = ".cache"
+CACHE_MANIFEST = "manifest.json"
+CACHE_VERSION = 6
+FRAMES = ("orders", "temps", "clients", "order_keys")
+
+# Orders export columns; Date/Time Modified is optional and used to spot edited orders
+ORDER_COLUMNS = (
+    'Order ID', 'Start Date', 'End Date', 'Client ID', 'Order Type', 'Order Specialty',
+    'Client Name', 'Client Zip', 'Contact', 'Temp ID', 'Client Type', 'Date/Time Modified',
+)
+
+# Columns are read as strings so ids such as "0123" or ids next to blanks keep their exact text
+data_types = {
+    'Order ID': str,
+    'Start Date': str,
+    'End Date': str,
+    'Client ID': str,
+    'Order Type': str,
+    'Order Specialty': str,
+    'Client Name': str,
+    'Client Zip': str,
+    'Contact': str,
+    'Temp ID': str,
+    'Client Type': str,
+    'Referral Source': str,
+    'Master Client': str
+}
+
+# Declared format of every date column, per export. A column that stops matching its
+# format falls back to inference rather than failing the load.
+DATE_FORMATS = {
+    'orders': {'Start Date': '%m/%d/%Y', 'End Date': '%m/%d/%Y'},
+    'temps': {'Date/Time Created': '%m/%d/%Y %H:%M'},
+    'clients': {'Date/Time Created': '%m/%d/%Y %I:%M %p'},
+}
+
+# Dates are kept as midnight datetime64 end to end; seconds is the coarsest unit pandas stores
+DATE_DTYPE = "datetime64[s]"
+
+# Orders are streamed in chunks of this many rows to bound peak memory while loading
+ORDERS_CHUNK_ROWS = int(os.environ.get("REMEDE_ORDERS_CHUNK_ROWS", "200000"))
+
+# String id columns stored as categoricals sharing one dictionary across orders, temps and clients
+CATEGORY_COLUMNS = ('Temp ID', 'Client ID', 'Client Type', 'Order Type', 'Referral Source')
+
+
+def file_hash(path, block_size=1 << 20):
+    """
+    Return the sha256 hex digest of a file, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_manifest(data_path, previous=None):
+    """
+    Describe the source exports by mtime, size and content hash.
+
+    Hashes from a previous manifest are reused when mtime and size are
+    unchanged, so a warm start never reads the csv files.
+    """
+    previous = previous or {}
+    manifest = {}
+    for name in SOURCE_FILES:
+        stat = os.stat(os.path.join(data_path, name))
+        entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+        old = previous.get(name)
+        if old and old["mtime"] == entry["mtime"] and old["size"] == entry["size"]:
+            entry["sha256"] = old["sha256"]
+        else:
+            entry["sha256"] = file_hash(os.path.join(data_path, name))
+        manifest[name] = entry
+    return manifest
+
+
+def shared_categories(frames, columns=CATEGORY_COLUMNS):
+    """
+    Return one categorical dtype per column, built from the values of every frame that has it.
+    """
+    dtypes = {}
+    for column in columns:
+        values = [frame[column] for frame in frames if column in frame]
+        if not values:
+            # Filled in later, e.g. by extend_categories as orders stream in
+            dtypes[column] = pd.CategoricalDtype(pd.Index([], dtype=object))
+            continue
+        values = pd.concat(values, ignore_index=True)
+        dtypes[column] = pd.CategoricalDtype(pd.Index(values.dropna().unique()).sort_values())
+    return dtypes
+
+
+def apply_schema(frames, dtypes):
+    """
+    Cast the shared columns of each frame to their categorical dtype in place.
+    """
+    for frame in frames:
+        for column, dtype in dtypes.items():
+            if column in frame:
+                frame[column] = frame[column].astype(dtype)
+
+
+def extend_categories(dtypes, frame):
+    """
+    Return dtypes with any new values of frame appended, so existing codes stay valid.
+    """
+    extended = {}
+    for column, dtype in dtypes.items():
+        if column not in frame:
+            extended[column] = dtype
+            continue
+        values = pd.Index(frame[column].dropna().unique())
+        new = values.difference(dtype.categories)
+        if len(new):
+            dtype = pd.CategoricalDtype(dtype.categories.append(new.sort_values()))
+        extended[column] = dtype
+    return extended
+
+
+def current_sources(data_path):
+    """
+    Return the source manifest for the exports as they are on disk now.
+    """
+    cached = _read_manifest(os.path.join(data_path, CACHE_DIR))
+    return source_manifest(data_path, cached["sources"] if cached else None)
+
+
+def sources_version(sources):
+    """
+    Return a short digest identifying the contents described by a source manifest.
+    """
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        digest.update(sources[name]["sha256"].encode("ascii"))
+    return digest.hexdigest()[:16]
+
+
+def dataset_version(data_path):
+    """
+    Return a short digest identifying the current contents of the exports.
+    """
+    return sources_version(current_sources(data_path))
+
+
+def parse_dates(values, date_format=None):
+    """
+    Parse date strings to day precision datetime64, parsing each distinct string once.
+
+    Exports repeat the same dates many times, so the column is factorized and only
+    its unique values go through the parser.
+    """
+    codes, uniques = pd.factorize(values)
+    try:
+        parsed = pd.to_datetime(uniques, format=date_format)
+    except (ValueError, TypeError):
+        print("Dates do not match {!r}, inferring the format".format(date_format))
+        parsed = pd.to_datetime(uniques, format="mixed")
+    parsed = parsed.normalize().values.astype(DATE_DTYPE)
+    # Code -1 (missing) takes the trailing NaT
+    return np.append(parsed, np.datetime64("NaT")).astype(DATE_DTYPE).take(codes)
+
+
+def read_orders(source, chunksize=None):
+    """
+    Read an orders export, or a chunk of one, with every column as text.
+
+    With a chunksize, returns an iterator of frames of at most that many rows.
+    """
+    return pd.read_csv(
+        source, usecols=lambda name: name in ORDER_COLUMNS, dtype=data_types, chunksize=chunksize
+    )
+
+
+def order_change_keys(orders):
+    """
+    Return Order ID and a change key per raw order row.
+
+    The key hashes Date/Time Modified when the export has it, otherwise the whole row.
+    """
+    if 'Order ID' not in orders:
+        return pd.DataFrame({'Order ID': pd.Series(dtype=object), 'Change Key': pd.Series(dtype='uint64')})
+    columns = ['Date/Time Modified'] if 'Date/Time Modified' in orders else list(orders.columns)
+    return pd.DataFrame({
+        'Order ID': orders['Order ID'].values,
+        'Change Key': pd.util.hash_pandas_object(orders[columns], index=False).values,
+    })
+
+
+# Columns orders take from temps and clients, grouped by the id they are looked up on
+ORDER_LOOKUP_COLUMNS = {
+    'Temp ID': ('temps', ['Referral Source']),
+    'Client ID': ('clients', ['Master Client', 'Date/Time Created']),
+}
+
+
+def order_lookups(temps, clients):
+    """
+    Return, per id column, arrays of temps and clients values aligned with the id's category codes.
+
+    Each array has one extra trailing slot holding a missing value, so code -1
+    (an unknown or missing id) looks up to NaN.
+    """
+    sources = {'temps': temps, 'clients': clients}
+    lookups = {}
+    for key, (source, columns) in ORDER_LOOKUP_COLUMNS.items():
+        frame = sources[source].drop_duplicates(key)
+        categories = frame[key].cat.categories
+        codes = frame[key].cat.codes.values
+        codes = codes[codes >= 0]
+        frame = frame[frame[key].notna()]
+        tables = {}
+        for column in columns:
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Keep categorical results as codes so the join never builds strings
+                table = np.full(len(categories) + 1, -1, dtype=values.cat.codes.dtype)
+                table[codes] = values.cat.codes.values
+                tables[column] = (table, values.dtype)
+            elif values.dtype.kind == "M":
+                table = np.full(len(categories) + 1, np.datetime64("NaT"), dtype=values.dtype)
+                table[codes] = values.values
+                tables[column] = (table, None)
+            else:
+                table = np.full(len(categories) + 1, np.nan, dtype=object)
+                table[codes] = values.values
+                tables[column] = (table, None)
+        lookups[key] = tables
+    return lookups
+
+
+def join_orders(orders, lookups):
+    """
+    Add every looked up temps and clients column to categorical orders in one pass per id.
+
+    Replaces three merges: each id column's codes are computed once and every
+    enriched column is a take from a prebuilt array, without copying orders.
+    """
+    for key, tables in lookups.items():
+        size = len(next(iter(tables.values()))[0]) - 1
+        codes = orders[key].cat.codes.values
+        # Ids missing from temps or clients, or first seen in orders, look up to the missing slot
+        codes = np.where((codes < 0) | (codes >= size), size, codes)
+        for column, (table, dtype) in tables.items():
+            values = table.take(codes)
+            if dtype is not None:
+                values = pd.Categorical.from_codes(values, dtype=dtype)
+            orders[column] = values
+    return orders
+
+
+def enrich_orders(orders, temps, clients):
+    """
+    Add referral source, master client and client creation date to categorical orders
+    and type their dates.
+
+    Expects clients with their Date/Time Created already parsed.
+    """
+    orders = join_orders(orders, order_lookups(temps, clients))
+    type_order_dates(orders)
+
+    # Orders stay sorted by Start Date so date ranges are row slices
+    return orders.sort_values('Start Date', kind='stable', ignore_index=True)
+
+
+def type_order_dates(orders):
+    """
+    Parse the order date columns in place.
+    """
+    for column, date_format in DATE_FORMATS['orders'].items():
+        orders[column] = parse_dates(orders[column], date_format)
+
+
+def stream_orders(path, temps, clients, dtypes, chunksize=ORDERS_CHUNK_ROWS):
+    """
+    Read the orders export in chunks, joining and typing each chunk as it arrives.
+
+    Yields (orders, change keys, dtypes) per chunk. Categorical dtypes grow by appending
+    new ids, so codes from earlier chunks stay valid. Only one raw chunk is held at a
+    time and no full-size merge copies are made.
+    """
+    lookups = order_lookups(temps, clients)
+    for chunk in read_orders(path, chunksize=chunksize):
+        keys = order_change_keys(chunk)
+        dtypes = extend_categories(dtypes, chunk)
+        apply_schema((chunk,), dtypes)
+        join_orders(chunk, lookups)
+        type_order_dates(chunk)
+        yield chunk, keys, dtypes
+
+
+def drop_restated_orders(orders, keys):
+    """
+    Keep only the last row of each repeated Order ID, and its change key.
+
+    A later row restates the order, whether it came in the same export or was appended
+    to it; full and incremental loads both go through here so they agree.
+    """
+    repeated = keys['Order ID'].duplicated(keep='last').values & keys['Order ID'].notna().values
+    if not repeated.any():
+        return orders, keys
+    return orders[~repeated].reset_index(drop=True), keys[~repeated].reset_index(drop=True)
+
+
+def load_orders(path, temps, clients, dtypes, chunksize=ORDERS_CHUNK_ROWS):
+    """
+    Stream the orders export into one frame sorted by Start Date.
+
+    Returns orders, their change keys and the final categorical dtypes.
+    """
+    chunks = []
+    keys = []
+    for chunk, chunk_keys, dtypes in stream_orders(path, temps, clients, dtypes, chunksize):
+        chunks.append(chunk)
+        keys.append(chunk_keys)
+    if not chunks:
+        # Header only export
+        chunks.append(read_orders(path))
+        keys.append(order_change_keys(chunks[0]))
+    # Bring earlier chunks up to the final dictionaries before concatenating
+    apply_schema(chunks, dtypes)
+    orders = pd.concat(chunks, ignore_index=True)
+    keys = pd.concat(keys, ignore_index=True)
+    del chunks
+    orders, keys = drop_restated_orders(orders, keys)
+    orders = orders.sort_values('Start Date', kind='stable', ignore_index=True)
+    return orders, keys, dtypes
+
+
+def merge_orders(kept, added):
+    """
+    Insert orders sorted by Start Date into kept orders sorted the same way, without re-sorting.
+
+    Added rows go after kept rows with the same Start Date, as appended rows do on a full
+    load. Returns the merged frame and the new positions of the kept and added rows.
+    """
+    dates = added['Start Date'].values
+    # Each added row lands before the kept row at its insertion point, after the added rows before it
+    added_positions = np.searchsorted(kept['Start Date'].values, dates, side="right") + np.arange(len(added))
+    is_added = np.zeros(len(kept) + len(added), dtype=bool)
+    is_added[added_positions] = True
+    kept_positions = np.flatnonzero(~is_added)
+    source = np.empty(len(is_added), dtype=np.int64)
+    source[kept_positions] = np.arange(len(kept))
+    source[added_positions] = len(kept) + np.arange(len(added))
+    merged = pd.concat([kept, added], ignore_index=True).take(source)
+    return merged.reset_index(drop=True), kept_positions, added_positions
+
+
+def read_exports(data_path):
+    """
+    Parse the three csv exports and return merged, typed orders, temps and clients frames,
+    plus the change key of every order.
+    """
+    # First Name,Last Name,Certification,Specialty,Work Type,Temp ID,Date/Time Created,Date/Time Modified,First Worked Date,Referral Source,Referred By
+    temps = pd.read_csv(os.path.join(data_path, TEMPS_FILE), dtype=data_types)
+    # Clients Client ID,Date/Time Created,Status,Client Type,Contract Date,Referral Source,Referred By Name,Master Client
+    clients = pd.read_csv(os.path.join(data_path, CLIENTS_FILE), dtype=data_types)
+    dtypes = shared_categories((temps, clients))
+    apply_schema((temps, clients), dtypes)
+    for name, frame in (('temps', temps), ('clients', clients)):
+        for column, date_format in DATE_FORMATS[name].items():
+            frame[column] = parse_dates(frame[column], date_format)
+
+    # Order ID,Start Date,End Date,Client ID,Order Type,Order Specialty,Client Name,Client Zip,Contact,Temp ID,Client Type
+    orders, order_keys, dtypes = load_orders(os.path.join(data_path, ORDERS_FILE), temps, clients, dtypes)
+    # Ids first seen in orders extend the dictionaries shared with temps and clients
+    apply_schema((temps, clients), dtypes)
+
+    return orders, temps, clients, order_keys
+
+
+def orders_appended(data_path, previous):
+    """
+    Return True if the orders export only grew, i.e. its old bytes are an unchanged prefix.
+    """
+    path = os.path.join(data_path, ORDERS_FILE)
+    size = previous["size"]
+    if os.stat(path).st_size <= size:
+        return False
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                return False
+            digest.update(block)
+            remaining -= len(block)
+        # The old file must have ended on a complete row
+        f.seek(size - 1)
+        if f.read(1) != b"\n":
+            return False
+    return digest.hexdigest() == previous["sha256"]
+
+
+def read_orders_delta(data_path, previous_sources, previous_keys):
+    """
+    Return raw orders that are new or changed since the previous load, the Order IDs
+    to drop from it, and the updated change keys.
+
+    A pure append only parses the appended bytes; otherwise the export is parsed and
+    rows are compared on Order ID and change key. Returns None when orders cannot be
+    matched by Order ID.
+    """
+    if 'Order ID' not in previous_keys or len(previous_keys) == 0:
+        return None
+    path = os.path.join(data_path, ORDERS_FILE)
+    previous = previous_sources[ORDERS_FILE]
+    if orders_appended(data_path, previous):
+        with open(path, "rb") as f:
+            header = f.readline()
+            f.seek(previous["size"])
+            tail = f.read()
+        added = read_orders(io.BytesIO(header + tail))
+        added, keys = drop_restated_orders(added, order_change_keys(added))
+        if not pd.Index(keys['Order ID']).is_unique:
+            return None
+        # Appended rows may restate existing orders
+        dropped = pd.Index(keys['Order ID']).intersection(pd.Index(previous_keys['Order ID']))
+        kept = previous_keys[~previous_keys['Order ID'].isin(dropped)]
+        return added, dropped, pd.concat([kept, keys], ignore_index=True)
+
+    orders = read_orders(path)
+    orders, keys = drop_restated_orders(orders, order_change_keys(orders))
+    old_ids = pd.Index(previous_keys['Order ID'])
+    new_ids = pd.Index(keys['Order ID'])
+    if not old_ids.is_unique or not new_ids.is_unique:
+        return None
+    position = old_ids.get_indexer(new_ids)
+    old_keys = previous_keys['Change Key'].values[position]
+    changed = (position < 0) | (old_keys != keys['Change Key'].values)
+    added = orders[changed].reset_index(drop=True)
+    # Drop edited orders and orders missing from the new export
+    dropped = old_ids.difference(new_ids).union(new_ids[changed & (position >= 0)])
+    return added, dropped, keys
+
+
+def _read_manifest(cache_path):
+    try:
+        with open(os.path.join(cache_path, CACHE_MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != CACHE_VERSION:
+        return None
+    return manifest
+
+
+def _write_atomic(path, write):
+    # Several workers may rebuild at once, so write to a private name and rename
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_cache(cache_path, frames, sources):
+    """
+    Write frames to uncompressed feather files plus a manifest of the sources they came from.
+    """
+    os.makedirs(cache_path, exist_ok=True)
+    for name, frame in zip(FRAMES, frames):
+        _write_atomic(
+            os.path.join(cache_path, name + ".feather"),
+            lambda p, frame=frame: feather.write_feather(
+                frame.reset_index(drop=True), p, compression="uncompressed"
+            ),
+        )
+    write_manifest(cache_path, sources)
+
+
+def write_manifest(cache_path, sources):
+    manifest = {"version": CACHE_VERSION, "sources": sources}
+
+    def dump(p):
+        with open(p, "w") as f:
+            json.dump(manifest, f, indent=1)
+
+    _write_atomic(os.path.join(cache_path, CACHE_MANIFEST), dump)
+
+
+def read_cache(cache_path):
+    """
+    Read the cached feather files and return them as pandas frames.
+
+    The conversion copies every column into the worker's own memory, so frames
+    are not shared between workers; mapping the files only spares the Arrow side
+    a second, private copy of each file while converting.
+    """
+    return tuple(
+        feather.read_table(os.path.join(cache_path, name + ".feather"), memory_map=True).to_pandas()
+        for name in FRAMES
+    )
+
+
+def load_data(data_path, use_cache=True):
+    """
+    Return orders, temps, clients and order change keys, served from the columnar cache
+    when the exports are unchanged.
+    """
+    if not use_cache or feather is None:
+        return read_exports(data_path)
+
+    cache_path = os.path.join(data_path, CACHE_DIR)
+    cached = _read_manifest(cache_path)
+    previous = cached["sources"] if cached else None
+    sources = source_manifest(data_path, previous)
+
+    if cached:
+        hashes = {name: entry["sha256"] for name, entry in sources.items()}
+        cached_hashes = {name: entry["sha256"] for name, entry in previous.items()}
+        if hashes == cached_hashes:
+            try:
+                frames = read_cache(cache_path)
+            except (OSError, ValueError):
+                frames = None
+            if frames is not None:
+                # Touched but unchanged exports only need their mtimes refreshed
+                if sources != previous:
+                    try:
+                        write_manifest(cache_path, sources)
+                    except OSError:
+                        pass
+                return frames
+
+    frames = read_exports(data_path)
+    try:
+        write_cache(cache_path, frames, sources)
+    except OSError as e:
+        print("Could not write data cache: {}".format(e))
+    return frames
+
+
+if __name__ == "__main__":
+    # Preprocessing stage: python data_loader.py [data_dir]
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    load_data(path)
+    print("Cache up to date in {}".format(os.path.join(path, CACHE_DIR)))
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+# Calendar buckets tried in order when a series has more points than its budget
+ROLLUP_UNITS = (("day", "datetime64[D]"), ("week", "datetime64[W]"), ("month", "datetime64[M]"))
+
+# datetime64[W] weeks start on Thursday 1970-01-01; shifting by three days makes them ISO weeks
+WEEK_SHIFT = np.timedelta64(3, "D")
+
+
+def buckets(dates, unit):
+    """
+    Return the calendar bucket of each day, weeks running Monday to Sunday.
+    """
+    if unit == "datetime64[W]":
+        return (dates + WEEK_SHIFT).astype(unit)
+    return dates.astype(unit)
+
+
+def bucket_starts(labels, unit):
+    """
+    Return the first day of each bucket.
+    """
+    if unit == "datetime64[W]":
+        return labels.astype("datetime64[D]") - WEEK_SHIFT
+    return labels.astype("datetime64[D]")
+
+
+def rollup(dates, values, unit):
+    """
+    Sum a sorted daily count series into calendar buckets, labelled by their first day.
+
+    The first bucket is labelled by the series' first day, so it never starts before the range.
+    """
+    labels, starts = np.unique(buckets(dates, unit), return_index=True)
+    if not len(labels):
+        return dates[:0], values[:0]
+    labels = bucket_starts(labels, unit)
+    labels[0] = max(labels[0], dates[0])
+    return labels, np.add.reduceat(values, starts)
+
+
+def lttb(x, y, threshold):
+    """
+    Return the indices of at most threshold points chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the previous pick and the next bucket's mean.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # Series are at most a few thousand days, where plain floats beat per-bucket numpy calls
+    x = np.asarray(x, dtype=np.float64).tolist()
+    y = np.asarray(y, dtype=np.float64).tolist()
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64).tolist() + [n]
+    picked = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, stop, next_stop = edges[i], edges[i + 1], edges[i + 2]
+        count = next_stop - stop
+        mean_x = sum(x[stop:next_stop]) / count
+        mean_y = sum(y[stop:next_stop]) / count
+        ax, ay = x[a], y[a]
+        best, best_area = start, -1.0
+        for j in range(start, stop):
+            area = abs((ax - mean_x) * (y[j] - ay) - (ax - x[j]) * (mean_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        picked.append(a)
+    picked.append(n - 1)
+    return np.array(picked, dtype=np.int64)
+
+
+def decimate(dates, values, max_points, keep=None):
+    """
+    Reduce a daily series to at most max_points with LTTB, always keeping the indices in keep.
+    """
+    if len(values) <= max_points:
+        return np.arange(len(values))
+    x = dates.astype("datetime64[D]").astype(np.int64)
+    picked = lttb(x, values, max_points)
+    if keep is not None and len(keep):
+        picked = np.union1d(picked, keep)
+    return picked
+
+
+def rollup_series(dates, values, max_points):
+    """
+    Fit a daily count series into max_points: daily if it fits, otherwise weekly or monthly
+    totals, and LTTB over the monthly totals as a last resort.
+
+    Returns dates, values and the bucket unit used.
+    """
+    if not len(dates):
+        return dates, values, "day"
+    if len(dates) <= max_points:
+        return dates, values, "day"
+    for name, unit in ROLLUP_UNITS[1:]:
+        # Range-spanning buckets, so a series with gaps is not rolled up coarser than needed
+        labels = buckets(dates[[0, -1]], unit).astype(np.int64)
+        if labels[1] - labels[0] + 1 <= max_points:
+            rolled_dates, rolled_values = rollup(dates, values, unit)
+            return rolled_dates, rolled_values, name
+    dates, values = rollup(dates, values, "datetime64[M]")
+    picked = decimate(dates, values, max_points)
+    return dates[picked], values[picked], "month"
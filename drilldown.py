@@ -0,0 +1,216 @@
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# One column condition of a DataTable filter_query, e.g. {Order Type} icontains "travel"
+_CONDITION = re.compile(r"^\{(?P<column>[^}]+)\}\s+(?P<operator>is blank|is nil|\S+)(?:\s+(?P<value>.+))?$", re.I)
+
+# Relational operators in their symbol and word forms, each may carry an i or s case prefix
+_RELATIONAL = {
+    "=": operator.eq, "eq": operator.eq,
+    "!=": operator.ne, "ne": operator.ne,
+    "<": operator.lt, "lt": operator.lt,
+    "<=": operator.le, "le": operator.le,
+    ">": operator.gt, "gt": operator.gt,
+    ">=": operator.ge, "ge": operator.ge,
+}
+
+# datestartswith prefix length to the span it covers
+_DATE_PREFIXES = {4: "datetime64[Y]", 7: "datetime64[M]", 10: "datetime64[D]"}
+
+
+def _unquote(value):
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1].replace("\\" + value[0], value[0])
+    return value
+
+
+def parse_filter_query(query):
+    """
+    Split a DataTable filter_query into (column, operator, case_sensitive, value) conditions.
+
+    The table ANDs its per-column queries; parts it cannot have produced are skipped.
+    """
+    conditions = []
+    for part in re.split(r"\s+(?:&&|and)\s+", query or "", flags=re.I):
+        match = _CONDITION.match(part.strip())
+        if match is None:
+            continue
+        name = match.group("operator").lower()
+        value = match.group("value")
+        if name in ("is blank", "is nil"):
+            conditions.append((match.group("column"), "blank", True, None))
+            continue
+        if value is None:
+            continue
+        case_sensitive = not name.startswith("i")
+        if name[0] in "is" and name[1:] in _RELATIONAL or name in ("icontains", "scontains"):
+            name = name[1:]
+        if name in _RELATIONAL or name in ("contains", "datestartswith"):
+            conditions.append((match.group("column"), name, case_sensitive, _unquote(value)))
+    return conditions
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _match(values, name, case_sensitive, value):
+    """
+    Evaluate one condition on a Series, returning a boolean numpy array.
+    """
+    if name == "blank":
+        blank = values.isna()
+        if values.dtype == object:
+            blank |= values.astype("string").str.strip().eq("").fillna(False)
+        return blank.to_numpy(dtype=bool)
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if name == "datestartswith":
+            unit = _DATE_PREFIXES.get(len(value))
+            try:
+                start = np.datetime64(value, unit[-2]) if unit else np.datetime64(value)
+            except (TypeError, ValueError):
+                return np.zeros(len(values), dtype=bool)
+            stop = start + 1 if unit else start + np.timedelta64(1, "D")
+            return ((values >= pd.Timestamp(start)) & (values < pd.Timestamp(stop))).to_numpy()
+        if name == "contains":
+            values = values.dt.strftime("%Y-%m-%d")
+        else:
+            try:
+                value = pd.Timestamp(value)
+            except (TypeError, ValueError):
+                return np.zeros(len(values), dtype=bool)
+            return _RELATIONAL[name](values, value).to_numpy(dtype=bool)
+
+    if name in _RELATIONAL and pd.api.types.is_numeric_dtype(values):
+        number = _number(value)
+        if number is None:
+            return np.zeros(len(values), dtype=bool)
+        return _RELATIONAL[name](values, number).fillna(False).to_numpy(dtype=bool)
+
+    if name in _RELATIONAL and _number(value) is not None:
+        # Ids are stored as text but filtered as numbers
+        numbers = pd.to_numeric(values, errors="coerce")
+        if numbers.notna().any():
+            return _RELATIONAL[name](numbers, _number(value)).fillna(False).to_numpy(dtype=bool)
+
+    text = values.astype("string")
+    value = str(value)
+    if not case_sensitive:
+        text, value = text.str.lower(), value.lower()
+    if name == "contains":
+        result = text.str.contains(value, regex=False)
+    elif name == "datestartswith":
+        result = text.str.startswith(value)
+    else:
+        result = _RELATIONAL[name](text, value)
+    return result.fillna(False).to_numpy(dtype=bool)
+
+
+def filter_rows(frame, rows, conditions):
+    """
+    Keep the row positions of frame whose values pass every condition.
+
+    Categorical columns are matched once per category and then by code, other columns
+    only on the rows still selected.
+    """
+    for column, name, case_sensitive, value in conditions:
+        if column not in frame.columns or not len(rows):
+            continue
+        series = frame[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = pd.Series(series.cat.categories)
+            matched = _match(categories, name, case_sensitive, value)
+            codes = series.cat.codes.to_numpy()[rows]
+            # Missing values have code -1, the last entry
+            matched = np.append(matched, name == "blank")
+            rows = rows[matched[codes]]
+        else:
+            rows = rows[_match(series.iloc[rows].reset_index(drop=True), name, case_sensitive, value)]
+    return rows
+
+
+def _value_ranks(values):
+    """
+    Rank distinct values numerically when they all parse as numbers, e.g. ids, else as text.
+    """
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    if numbers.notna().all():
+        order = np.argsort(numbers.to_numpy(np.float64), kind="stable")
+    else:
+        order = np.argsort(np.asarray(values).astype(str), kind="stable")
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    # Missing codes (-1) land on the trailing slot
+    return np.append(ranks, 0)
+
+
+def _sort_key(series, rows, descending):
+    """
+    Integer or float key ordering the rows by one column, missing values last either way.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Rank the few categories once, then look the rows' codes up
+        codes = series.cat.codes.to_numpy()[rows]
+        missing = codes == -1
+        key = _value_ranks(series.cat.categories)[codes]
+    elif pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy()[rows]
+        missing = pd.isna(values)
+        key = values.view(np.int64) if values.dtype.kind == "M" else values.astype(np.float64)
+    else:
+        codes, uniques = pd.factorize(series.iloc[rows])
+        missing = codes == -1
+        key = _value_ranks(uniques)[codes]
+    key = -key if descending else key.copy()
+    if key.dtype.kind == "f":
+        key[missing] = np.inf
+    else:
+        key[missing] = np.iinfo(key.dtype).max
+    return key
+
+
+def sort_rows(frame, rows, sort_by):
+    """
+    Order row positions by the DataTable sort_by list, first entry first; ties keep frame order.
+    """
+    keys = [
+        _sort_key(frame[entry["column_id"]], rows, entry.get("direction") == "desc")
+        for entry in sort_by or []
+        if entry.get("column_id") in frame.columns
+    ]
+    if not keys or not len(rows):
+        return rows
+    # lexsort sorts by its last key first
+    return rows[np.lexsort(keys[::-1])]
+
+
+def table_columns(frame):
+    """
+    DataTable column definitions for every column of frame.
+    """
+    return [
+        {"name": column, "id": column, "type": "datetime" if pd.api.types.is_datetime64_any_dtype(dtype) else
+         "numeric" if pd.api.types.is_numeric_dtype(dtype) else "text"}
+        for column, dtype in frame.dtypes.items()
+    ]
+
+
+def page_records(frame, rows, page_current, page_size):
+    """
+    Records of one page of the ordered row positions, ready for a DataTable.
+    """
+    page = frame.iloc[rows[page_current * page_size:(page_current + 1) * page_size]]
+    page = page.apply(
+        lambda column: column.dt.strftime("%Y-%m-%d") if pd.api.types.is_datetime64_any_dtype(column) else column
+    )
+    page = page.astype(object)
+    return page.where(page.notna(), None).to_dict("records")
@@ -0,0 +1,97 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Content type and file extension of every export format
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def frame_batches(frame, start, stop, rows, batch_rows):
+    """
+    Yield the selected rows of frame as frames of at most batch_rows rows.
+
+    rows holds the selected positions, or None for every row from start to stop; only
+    one batch is copied out of frame at a time.
+    """
+    if rows is None:
+        for offset in range(start, stop, batch_rows):
+            yield frame.iloc[offset:min(offset + batch_rows, stop)]
+        return
+    for offset in range(0, len(rows), batch_rows):
+        yield frame.iloc[rows[offset:offset + batch_rows]]
+
+
+def csv_stream(frame, batches):
+    """
+    Yield a CSV export batch by batch, the header first so an empty selection still has one.
+    """
+    yield frame.iloc[:0].to_csv(index=False)
+    for batch in batches:
+        yield batch.to_csv(index=False, header=False)
+
+
+class _ChunkSink:
+    """
+    Write-only file that hands its bytes over on every take(), so the writer never holds the export.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._buffer = io.BytesIO()
+        self._position = 0
+
+    def write(self, data):
+        self._position += len(data)
+        return self._buffer.write(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = self._buffer.getvalue()
+        self._buffer = io.BytesIO()
+        return data
+
+
+def parquet_schema(frame):
+    """
+    Arrow schema for every batch of frame; text columns stay strings even in all-null batches.
+    """
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    for index, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(index, field.with_type(pa.string()))
+    return schema
+
+
+def parquet_stream(frame, batches):
+    """
+    Yield a Parquet export with one row group per batch, as each row group is written.
+    """
+    schema = parquet_schema(frame)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+            yield sink.take()
+    # The footer is written on close
+    yield sink.take()
+
+
+def export_stream(export_format, frame, batches):
+    if export_format == "parquet":
+        return parquet_stream(frame, batches)
+    return csv_stream(frame, batches)
+
+
+def selected_count(start, stop, rows):
+    return stop - start if rows is None else int(np.size(rows))
@@ -0,0 +1,20 @@
+import gc
+import os
+
+
+# Set REMEDE_PRELOAD=1 to load the exports once in the master and fork workers that share
+# the loaded frames copy-on-write, instead of every worker parsing them on its own
+preload_app = os.environ.get("REMEDE_PRELOAD", "0") == "1"
+
+# Threads per worker, so a long streamed export does not hold up the dashboard's callbacks
+threads = int(os.environ.get("REMEDE_THREADS", "4"))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import app
+
+    app.preload_data()
+    # Objects loaded so far are never collected, so the collector does not touch their pages
+    gc.freeze()
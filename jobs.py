@@ -0,0 +1,68 @@
+from dash import DiskcacheManager
+
+try:
+    import diskcache
+except ImportError:
+    # Background callbacks need pip install "dash[diskcache]"
+    diskcache = None
+
+
+# Job id handed out when the result is already on disk and nothing was started
+NO_JOB = 0
+
+
+class SharedJobManager(DiskcacheManager):
+    """
+    Disk-backed background callback manager that runs at most one job per cache key.
+
+    Identical requests in flight wait on the same process, finished results are served
+    from disk until they expire, and a job is only terminated, e.g. because its filters
+    changed again, once no request waits on it anymore.
+    """
+
+    def _job_key(self, key):
+        return "remede-job-{}".format(key)
+
+    def _waiters_key(self, job):
+        return "remede-waiters-{}".format(job)
+
+    def call_job_fn(self, key, job_fn, args, context):
+        with self.handle.transact():
+            if self.result_ready(key):
+                return NO_JOB
+            job = self.handle.get(self._job_key(key))
+            if job is not None and self.job_running(job):
+                self.handle.incr(self._waiters_key(job))
+                return job
+            job = super().call_job_fn(key, job_fn, args, context)
+            self.handle.set(self._job_key(key), job, expire=self.expire)
+            self.handle.set(self._waiters_key(job), 1, expire=self.expire)
+        return job
+
+    def terminate_job(self, job):
+        if job is None or int(job) == NO_JOB:
+            return
+        job = int(job)
+        with self.handle.transact():
+            waiters = self.handle.get(self._waiters_key(job), 1) - 1
+            if waiters > 0:
+                self.handle.set(self._waiters_key(job), waiters, expire=self.expire)
+                return
+            self.handle.delete(self._waiters_key(job))
+        super().terminate_job(job)
+
+    def job_running(self, job):
+        return int(job) != NO_JOB and super().job_running(job)
+
+    def get_progress(self, key):
+        # Left in place for every request sharing the job; cleared with the result
+        return self.handle.get(self._make_progress_key(key))
+
+
+def job_manager(path, cache_by, expire=3600):
+    """
+    Build a SharedJobManager storing jobs' progress and results under path.
+    """
+    if diskcache is None:
+        raise ImportError('Background callbacks need diskcache: pip install "dash[diskcache]"')
+    return SharedJobManager(diskcache.Cache(path), cache_by=cache_by, expire=expire)
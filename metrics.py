@@ -0,0 +1,189 @@
+import bisect
+import functools
+import threading
+import time
+
+from flask import Response, request
+
+
+# Upper bounds of the histogram buckets, +Inf is implied
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROWS_BUCKETS = (0, 100, 1000, 10000, 100000, 1000000, 10000000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25)
+
+# Rows scanned and cache hits of the callback running on this thread
+_scope = threading.local()
+
+
+def count_rows(rows):
+    """
+    Add rows scanned to the callback running on this thread, if any.
+    """
+    counts = getattr(_scope, "counts", None)
+    if counts is not None:
+        counts["rows"] += rows
+
+
+def count_cache_hit(_name=None):
+    """
+    Add a result cache hit to the callback running on this thread, if any.
+    """
+    counts = getattr(_scope, "counts", None)
+    if counts is not None:
+        counts["cache_hits"] += 1
+
+
+def _format_labels(names, values, extra=""):
+    pairs = ['{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Thread-safe Prometheus style histogram with fixed buckets, one series per label set.
+    """
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per bucket counts, the last one is +Inf, then the sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [
+            "# HELP {} {}".format(self.name, self.documentation),
+            "# TYPE {} histogram".format(self.name),
+        ]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    self.name, _format_labels(self.labelnames, labels, 'le="{}"'.format(bound)), cumulative
+                ))
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append("{}_sum{} {}".format(self.name, label_text, values[-1]))
+            lines.append("{}_count{} {}".format(self.name, label_text, cumulative))
+        return lines
+
+
+class Metrics:
+    """
+    Histograms of HTTP requests and Dash callbacks, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "remede_http_request_duration_seconds", "Wall time of HTTP requests.",
+            SECONDS_BUCKETS, ("route", "method", "status"),
+        )
+        self.request_bytes = Histogram(
+            "remede_http_response_bytes", "Size of HTTP response bodies.",
+            BYTES_BUCKETS, ("route", "method", "status"),
+        )
+        self.callback_seconds = Histogram(
+            "remede_callback_duration_seconds", "Wall time of Dash callbacks, serialization included.",
+            SECONDS_BUCKETS, ("callback",),
+        )
+        self.callback_bytes = Histogram(
+            "remede_callback_response_bytes", "Size of serialized Dash callback responses.",
+            BYTES_BUCKETS, ("callback",),
+        )
+        self.callback_rows = Histogram(
+            "remede_callback_rows_scanned", "Order rows scanned by filter_df per callback.",
+            ROWS_BUCKETS, ("callback",),
+        )
+        self.callback_cache_hits = Histogram(
+            "remede_callback_cache_hits", "Result cache hits per callback.",
+            COUNT_BUCKETS, ("callback",),
+        )
+
+    def histograms(self):
+        return (
+            self.request_seconds, self.request_bytes, self.callback_seconds,
+            self.callback_bytes, self.callback_rows, self.callback_cache_hits,
+        )
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+    def wrap_callback(self, name, func):
+        """
+        Wrap a registered Dash callback so every call records its time, rows, cache hits and bytes.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_scope, "counts", None)
+            _scope.counts = {"rows": 0, "cache_hits": 0}
+            started = time.perf_counter()
+            try:
+                response = func(*args, **kwargs)
+            finally:
+                counts = _scope.counts
+                _scope.counts = outer
+                self.callback_seconds.observe(time.perf_counter() - started, name)
+                self.callback_rows.observe(counts["rows"], name)
+                self.callback_cache_hits.observe(counts["cache_hits"], name)
+            if isinstance(response, (str, bytes)):
+                self.callback_bytes.observe(len(response), name)
+            return response
+        return wrapper
+
+    def instrument_callbacks(self, app):
+        """
+        Wrap every server side callback registered on app, labelled by its function name
+        or, where several share a name, by its first output too.
+        """
+        entries = [(key, entry) for key, entry in app.callback_map.items() if "callback" in entry]
+        names = [getattr(entry["callback"], "__name__", key) for key, entry in entries]
+        for (key, entry), name in zip(entries, names):
+            if names.count(name) > 1:
+                name = "{}:{}".format(name, key.strip(".").split("...")[0])
+            entry["callback"] = self.wrap_callback(name, entry["callback"])
+
+    def install(self, server, path="/metrics"):
+        """
+        Time every request to the Flask server and serve the histograms on path.
+        """
+        metrics = self
+
+        @server.before_request
+        def start_timer():
+            request.environ["remede.started"] = time.perf_counter()
+
+        @server.after_request
+        def record_request(response):
+            started = request.environ.get("remede.started")
+            if started is not None:
+                rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+                labels = (rule, request.method, response.status_code)
+                metrics.request_seconds.observe(time.perf_counter() - started, *labels)
+                if not response.is_streamed:
+                    metrics.request_bytes.observe(response.calculate_content_length() or 0, *labels)
+            return response
+
+        def serve_metrics():
+            return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+        server.add_url_rule(path, "remede_metrics", serve_metrics)
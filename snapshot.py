@@ -0,0 +1,280 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from aggregates import (
+    DateIndex,
+    InvertedIndex,
+    build_control_limits,
+    build_cubes,
+    daily_counts,
+    update_cubes,
+    update_daily_counts,
+)
+from data_loader import (
+    CACHE_DIR,
+    CATEGORY_COLUMNS,
+    ORDERS_FILE,
+    SOURCE_FILES,
+    apply_schema,
+    current_sources,
+    feather,
+    enrich_orders,
+    extend_categories,
+    load_data,
+    merge_orders,
+    read_orders_delta,
+    sources_version,
+    write_cache,
+)
+
+
+# One load of the exports and everything derived from it. Callbacks take the
+# current snapshot once and read only from it, so a reload mid-request never
+# mixes old and new data. Treat the frames as read-only.
+Snapshot = namedtuple(
+    "Snapshot",
+    [
+        "version", "data_version", "sources", "orders", "temps", "clients", "order_keys",
+        "df", "cubes", "control_limits", "orders_index", "filter_index", "dropdown_options",
+    ],
+)
+
+
+# Segment panel dropdowns and the frame and column their options come from
+DROPDOWN_COLUMNS = {
+    "sourceList": ("temps", "Referral Source"),
+    "orderTypeList": ("orders", "Order Type"),
+    "clientTypeList": ("orders", "Client Type"),
+}
+
+
+def dropdown_options(filter_index, temps):
+    """
+    Return the options of each segment panel dropdown, in order of first appearance.
+
+    Order columns are read from the filter index, so this never scans the orders.
+    """
+    options = {}
+    for dropdown, (frame, column) in DROPDOWN_COLUMNS.items():
+        if frame == "orders":
+            values = filter_index.present_values(column)
+        else:
+            values = temps[column].dropna().unique()
+        options[dropdown] = [{"label": value, "value": value} for value in values]
+    return options
+
+
+def build_snapshot(data_path, version=1):
+    """
+    Load the exports and precompute every derived table.
+    """
+    # Describe the sources before reading them; a change mid-load is then seen as a new change
+    sources = current_sources(data_path)
+    orders, temps, clients, order_keys = load_data(data_path)
+    cubes = build_cubes(orders, temps)
+    filter_index = InvertedIndex(orders)
+    return Snapshot(
+        version=version,
+        data_version=sources_version(sources),
+        sources=sources,
+        orders=orders,
+        temps=temps,
+        clients=clients,
+        order_keys=order_keys,
+        df=daily_counts(orders, temps),
+        # Daily counts per metric by referral source, order type and client type
+        cubes=cubes,
+        # Unfiltered control chart limits for the dive down chart
+        control_limits=build_control_limits(cubes),
+        # Orders are stored sorted by Start Date; date ranges resolve to row slices
+        orders_index=DateIndex(orders, 'Start Date'),
+        # Row postings per referral source, order type, client type and master client
+        filter_index=filter_index,
+        # Computed once here instead of on every render of the segment panel
+        dropdown_options=dropdown_options(filter_index, temps),
+    )
+
+
+def update_snapshot(previous, data_path, version):
+    """
+    Return a snapshot for the exports on disk and whether it was built incrementally.
+
+    When only the orders export changed, new and edited orders are merged into the
+    previous snapshot without re-sorting, and the daily counts, cubes and filter
+    postings are patched from the delta. Rows still shift position, a linear copy,
+    but nothing is re-sorted, re-hashed or re-counted over every order. Anything
+    else falls back to a full load.
+    """
+    sources = current_sources(data_path)
+    changed = [name for name in SOURCE_FILES if sources[name]["sha256"] != previous.sources[name]["sha256"]]
+    if changed != [ORDERS_FILE]:
+        return build_snapshot(data_path, version), False
+    delta = read_orders_delta(data_path, previous.sources, previous.order_keys)
+    if delta is None:
+        return build_snapshot(data_path, version), False
+    added, dropped, order_keys = delta
+
+    # Extend the shared dictionaries with any new ids; existing codes keep their meaning
+    orders = previous.orders
+    dtypes = extend_categories(
+        {column: orders[column].dtype for column in CATEGORY_COLUMNS if column in orders}, added
+    )
+    apply_schema((added,), dtypes)
+    added = enrich_orders(added, previous.temps, previous.clients)
+    apply_schema((added,), dtypes)
+
+    if len(dropped):
+        kept_rows = ~orders['Order ID'].isin(dropped).values
+        removed = orders[~kept_rows]
+        kept = orders[kept_rows].copy(deep=False)
+    else:
+        kept_rows = np.ones(len(orders), dtype=bool)
+        removed = orders.iloc[:0]
+        kept = orders.copy(deep=False)
+    apply_schema((kept,), dtypes)
+    orders, kept_positions, added_positions = merge_orders(kept, added)
+    filter_index = previous.filter_index.updated(kept_rows, kept_positions, added, added_positions)
+
+    cubes = update_cubes(previous.cubes, orders, previous.temps, added, removed)
+    snapshot = previous._replace(
+        version=version,
+        data_version=sources_version(sources),
+        sources=sources,
+        orders=orders,
+        order_keys=order_keys,
+        df=update_daily_counts(previous.df, added, removed),
+        cubes=cubes,
+        control_limits=build_control_limits(cubes),
+        orders_index=DateIndex(orders, 'Start Date'),
+        filter_index=filter_index,
+        dropdown_options=dropdown_options(filter_index, previous.temps),
+    )
+    return snapshot, True
+
+
+def source_signature(data_path):
+    """
+    Return the (mtime, size) of each export, or None while one is missing.
+    """
+    try:
+        return tuple(
+            (stat.st_mtime_ns, stat.st_size)
+            for stat in (os.stat(os.path.join(data_path, name)) for name in SOURCE_FILES)
+        )
+    except OSError:
+        return None
+
+
+class SnapshotStore:
+    """
+    Holds the current snapshot and swaps in new ones atomically.
+
+    Given a loader instead of a snapshot, the first snapshot is built on first
+    use; concurrent first readers wait for one load instead of each loading.
+    """
+
+    def __init__(self, snapshot=None, loader=None):
+        self._snapshot = snapshot
+        self._loader = loader
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def loaded(self):
+        return self._snapshot is not None
+
+    def current(self):
+        # Rebinding an attribute is atomic, readers never need the lock once loaded
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._load()
+        return snapshot
+
+    def _load(self):
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            snapshot = self._loader()
+            self._snapshot = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+        return snapshot
+
+    def on_swap(self, listener):
+        """
+        Register listener(snapshot) to run after the first load and every swap, e.g. to invalidate caches.
+        """
+        self._listeners.append(listener)
+
+    def swap(self, snapshot):
+        with self._lock:
+            self._snapshot = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+
+
+class DataWatcher(threading.Thread):
+    """
+    Polls the data directory and reloads the snapshot when an export changes.
+
+    A change is only picked up once the files have stopped changing for one
+    poll interval, so a half-copied export is never parsed.
+    """
+
+    def __init__(self, store, data_path, interval=30):
+        super().__init__(name="remede-data-watcher", daemon=True)
+        self.store = store
+        self.data_path = data_path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def reload(self):
+        """
+        Build a new snapshot off the request path and swap it in.
+        """
+        current = self.store.current()
+        started = time.time()
+        snapshot, incremental = update_snapshot(current, self.data_path, current.version + 1)
+        if snapshot.data_version == current.data_version:
+            return current
+        self.store.swap(snapshot)
+        print("Loaded data snapshot {} ({}, {}) in {:.1f}s".format(
+            snapshot.version, snapshot.data_version,
+            "incremental" if incremental else "full", time.time() - started))
+        if incremental and feather is not None:
+            # Keep the columnar cache current for the next worker start
+            try:
+                write_cache(
+                    os.path.join(self.data_path, CACHE_DIR),
+                    (snapshot.orders, snapshot.temps, snapshot.clients, snapshot.order_keys),
+                    snapshot.sources,
+                )
+            except OSError as e:
+                print("Could not write data cache: {}".format(e))
+        return snapshot
+
+    def run(self):
+        loaded = source_signature(self.data_path)
+        pending = None
+        while not self._stop_event.wait(self.interval):
+            signature = source_signature(self.data_path)
+            if signature is None or signature == loaded:
+                pending = None
+                continue
+            if signature != pending:
+                # Changed since the last poll, wait until it settles
+                pending = signature
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                print("Could not reload data, keeping snapshot {}: {}".format(
+                    self.store.current().version, e))
+            loaded = signature
+            pending = None
@@ -0,0 +1,61 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "benchmarks"))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from synthetic import generate  # noqa: E402
+
+
+# Small enough to load in a fraction of a second, large enough that every filter value occurs
+SYNTHETIC_ORDERS = 3000
+
+
+@pytest.fixture(scope="session")
+def exports_path(tmp_path_factory):
+    """
+    Synthetic exports shared by every test that only reads them.
+    """
+    path = str(tmp_path_factory.mktemp("exports"))
+    generate(SYNTHETIC_ORDERS, path, seed=1)
+    return path
+
+
+@pytest.fixture
+def fresh_exports(tmp_path):
+    """
+    Synthetic exports a test may modify.
+    """
+    path = str(tmp_path / "exports")
+    generate(SYNTHETIC_ORDERS, path, seed=1)
+    return path
+
+
+@pytest.fixture(scope="session")
+def snapshot(exports_path):
+    from snapshot import build_snapshot
+    return build_snapshot(exports_path)
+
+
+@pytest.fixture(scope="session")
+def app(exports_path):
+    """
+    The dashboard module, reading the synthetic exports and never watching them.
+    """
+    settings = {"REMEDE_DATA_PATH": exports_path, "REMEDE_DATA_RELOAD_INTERVAL": "0", "REMEDE_SHARED_CACHE": ""}
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    sys.modules.pop("app", None)
+    try:
+        yield importlib.import_module("app")
+    finally:
+        sys.modules.pop("app", None)
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import (
+    CUBE_DIMENSIONS,
+    FILTER_DIMENSIONS,
+    CountCube,
+    DateIndex,
+    InvertedIndex,
+    active_placements,
+    build_cubes,
+    build_dimensions,
+    control_chart,
+    daily_series,
+    deviation_summary,
+    rolling_mean_std,
+)
+from data_loader import merge_orders
+
+
+def _selection_mask(orders, selections):
+    mask = np.ones(len(orders), dtype=bool)
+    for column, values in selections.items():
+        if values:
+            mask &= orders[column].isin(values).values
+    return mask
+
+
+def _selections(orders, rng):
+    """
+    A random selection of one or two values on a random subset of the filter dimensions.
+    """
+    selections = {}
+    for column in FILTER_DIMENSIONS:
+        values = orders[column].dropna().unique()
+        if rng.random() < 0.5:
+            selections[column] = list(rng.choice(values, min(len(values), rng.integers(1, 3)), replace=False))
+    return selections
+
+
+def test_date_index_bounds_are_inclusive(snapshot):
+    orders = snapshot.orders
+    index = DateIndex(orders, "Start Date")
+    start, stop = index.bounds("2016-03-01", "2016-03-31T10:00:00")
+    days = orders["Start Date"]
+    expected = np.flatnonzero((days >= "2016-03-01") & (days < "2016-04-01"))
+    assert (start, stop) == (expected[0], expected[-1] + 1)
+    assert index.bounds("2030-01-01", None) == (len(orders), len(orders))
+
+
+def test_inverted_index_matches_a_boolean_mask(snapshot):
+    orders = snapshot.orders
+    index = InvertedIndex(orders)
+    rng = np.random.default_rng(0)
+    assert index.select({column: None for column in FILTER_DIMENSIONS}) is None
+    for _ in range(50):
+        selections = _selections(orders, rng)
+        start = int(rng.integers(0, len(orders)))
+        stop = int(rng.integers(start, len(orders) + 1))
+        rows = index.select(selections, start, stop)
+        expected = np.flatnonzero(_selection_mask(orders, selections)[start:stop]) + start
+        if not any(selections.values()):
+            assert rows is None
+        else:
+            assert np.array_equal(rows, expected)
+
+
+def test_inverted_index_present_values_in_first_appearance_order(snapshot):
+    index = InvertedIndex(snapshot.orders)
+    assert list(index.present_values("Order Type")) == list(snapshot.orders["Order Type"].dropna().unique())
+
+
+def test_inverted_index_update_matches_a_rebuild(snapshot):
+    orders = snapshot.orders
+    rng = np.random.default_rng(1)
+    kept_rows = rng.random(len(orders)) > 0.1
+    added = orders.sample(200, random_state=2).sort_values("Start Date", kind="stable")
+    merged, kept_positions, added_positions = merge_orders(orders[kept_rows], added)
+    updated = InvertedIndex(orders).updated(kept_rows, kept_positions, added, added_positions)
+    rebuilt = InvertedIndex(merged)
+    for _ in range(30):
+        selections = _selections(merged, rng)
+        if any(selections.values()):
+            assert np.array_equal(updated.select(selections), rebuilt.select(selections))
+
+
+def _cube(orders, column="Start Date"):
+    return CountCube.build(orders, column, build_dimensions(orders))
+
+
+def test_count_cube_series_matches_filtered_counts(snapshot):
+    orders = snapshot.orders
+    cube = _cube(orders)
+    selections = [["Indeed", "Website"], ["Travel"], None]
+    dates, counts = cube.series("2016-01-01", "2016-12-31", selections)
+    mask = _selection_mask(orders, dict(zip(CUBE_DIMENSIONS, selections)))
+    days = orders["Start Date"][mask]
+    expected = days[(days >= "2016-01-01") & (days <= "2016-12-31")].value_counts().sort_index()
+    assert list(dates) == list(expected.index.values.astype("datetime64[D]"))
+    assert list(counts) == list(expected.values)
+
+
+def test_count_cube_apply_delta_matches_a_rebuild(snapshot):
+    orders = snapshot.orders
+    removed = orders.iloc[:300]
+    added = orders.iloc[:100].copy()
+    added["Start Date"] = added["Start Date"] + pd.Timedelta(days=4000)
+    after = pd.concat([orders.iloc[300:], added], ignore_index=True)
+    dimensions = build_dimensions(after)
+    patched = _cube(orders).apply_delta(added, removed, dimensions)
+    rebuilt = CountCube.build(after, "Start Date", dimensions)
+    for selections in ([None, None, None], [["Indeed"], ["Contract", "Travel"], ["School"]]):
+        patched_dates, patched_counts = patched.series(None, None, selections)
+        rebuilt_dates, rebuilt_counts = rebuilt.series(None, None, selections)
+        assert np.array_equal(patched_dates, rebuilt_dates)
+        assert np.array_equal(patched_counts, rebuilt_counts)
+
+
+def test_count_cube_apply_delta_rebuilds_reordered_dimensions(snapshot):
+    orders = snapshot.orders
+    dimensions = build_dimensions(orders)
+    dimensions["Order Type"] = dimensions["Order Type"][::-1]
+    assert _cube(orders).apply_delta(orders.iloc[:0], orders.iloc[:0], dimensions) is None
+
+
+def test_active_placements_counts_started_and_not_ended_orders(snapshot):
+    orders = snapshot.orders
+    starts, ends = snapshot.cubes["Placement Starts"], snapshot.cubes["Placement Ends"]
+    selections = [None, ["Per Diem"], None]
+    days, active = active_placements(starts, ends, "2016-06-01", "2016-06-30", selections)
+    chosen = orders[orders["Order Type"] == "Per Diem"]
+    expected = [
+        int(((chosen["Start Date"] <= day) & ~(chosen["End Date"] < day)).sum())
+        for day in pd.to_datetime(days)
+    ]
+    assert len(days) == 30 and list(active) == expected
+
+
+
+def test_active_placements_skip_orders_without_a_start_or_ending_before_it():
+    orders = pd.DataFrame({
+        "Start Date": pd.to_datetime(["2020-01-01", None, "2020-01-05"]),
+        "End Date": pd.to_datetime(["2020-01-10", "2020-01-03", "2020-01-04"]),
+        "Date/Time Created": pd.to_datetime(["2019-12-01"] * 3),
+        "Referral Source": ["Web"] * 3,
+        "Order Type": ["Contract"] * 3,
+        "Client Type": ["Hospital"] * 3,
+    })
+    cubes = build_cubes(orders, orders.iloc[:0])
+    days, active = active_placements(
+        cubes["Placement Starts"], cubes["Placement Ends"], "2020-01-01", "2020-01-15", [None] * 3
+    )
+    assert list(active) == [1] * 10 + [0] * 5
+
+def test_daily_series_fills_missing_days_with_zero(snapshot):
+    cube = _cube(snapshot.orders)
+    days, values = daily_series(cube, "2014-12-30", "2015-01-02", [None, None, None])
+    assert list(days.astype(str)) == ["2014-12-30", "2014-12-31", "2015-01-01", "2015-01-02"]
+    assert list(values[:2]) == [0, 0] and values[2] > 0
+
+
+def test_rolling_mean_std_uses_the_trailing_window():
+    values = np.array([1.0, 2.0, 4.0, 8.0, 16.0])
+    mean, std, size = rolling_mean_std(values, 2)
+    trailing = pd.Series(values).rolling(2, min_periods=1)
+    assert np.isnan(mean[0]) and list(size) == [0, 1, 2, 2, 2]
+    assert np.allclose(mean[1:], trailing.mean().values[:-1])
+    assert np.allclose(std[2:], trailing.std().values[1:-1])
+
+
+def test_deviation_summary_scores_only_days_in_range():
+    dates = np.arange("2020-01-01", "2020-03-01", dtype="datetime64[D]")
+    counts = np.full((len(dates), 1, 1, 1), 10, dtype=np.int32)
+    # One spike in the range, after a steady history
+    counts[-10] = 100
+    cube = CountCube(dates, counts, [None, None, None], "Start Date")
+    over_1sd, over_2sd = deviation_summary(cube, "2020-02-01", "2020-02-29", [None, None, None])
+    assert over_2sd == pytest.approx(100.0 / 29)
+    assert over_1sd >= over_2sd
+    assert deviation_summary(cube, "2021-01-01", "2020-12-31", [None, None, None]) == (0.0, 0.0)
+
+
+def test_control_chart_flags_days_beyond_three_sd():
+    dates = np.arange("2020-01-01", "2020-01-31", dtype="datetime64[D]")
+    counts = np.full((len(dates), 1, 1, 1), 10, dtype=np.int32)
+    counts[::2] = 12
+    counts[15] = 60
+    cube = CountCube(dates, counts, [None, None, None], "Start Date")
+    days, values, mean, std, out_of_control = control_chart(cube, None, None, [None, None, None])
+    assert list(np.flatnonzero(out_of_control)) == [15]
@@ -0,0 +1,151 @@
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+FILTERS = (["Indeed", "Website"], ["Travel", "Contract"], "2016-01-01", "2017-12-31", None)
+
+
+def _decode(spec):
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype=np.dtype(spec["dtype"]))
+
+
+def _call(app, output, values, changed=()):
+    """
+    Run a callback through the Dash endpoint, values keyed by "id.property".
+    """
+    key = next(key for key in app.app.callback_map if output in key)
+    entry = app.app.callback_map[key]
+    body = {
+        "output": key,
+        "outputs": [dict(zip(("id", "property"), part.rsplit(".", 1))) for part in key.strip(".").split("...")],
+        "inputs": [dict(item, value=values.get("{id}.{property}".format(**item))) for item in entry["inputs"]],
+        "state": [dict(item, value=values.get("{id}.{property}".format(**item))) for item in entry["state"]],
+        "changedPropIds": list(changed),
+    }
+    response = app.server.test_client().post("/_dash-update-component", json=body)
+    assert response.status_code == 200
+    return response.json["response"]
+
+
+def _expected_orders(app, sourceList, orderTypeList, start_date, end_date, clientTypeList):
+    orders = app.snapshots.current().orders
+    mask = (orders["Start Date"] >= start_date) & (orders["Start Date"] <= end_date)
+    for column, values in (("Referral Source", sourceList), ("Order Type", orderTypeList),
+                           ("Client Type", clientTypeList)):
+        if values:
+            mask &= orders[column].isin(values)
+    return orders[mask]
+
+
+def test_layout_and_default_tab_need_no_data(app, monkeypatch):
+    def load():
+        raise AssertionError("the layout read the data")
+
+    monkeypatch.setattr(app.snapshots, "current", load)
+    app.serve_layout()
+    app.render_tab_content("tab2")
+
+
+def test_placeholders_are_filled_from_the_snapshot(app):
+    data = app.snapshots.current()
+    options = app.update_segment_options("tab2")
+    assert list(options) == [data.dropdown_options[name] for name in ("sourceList", "orderTypeList", "clientTypeList")]
+    assert [column["id"] for column in app.update_drilldown_columns("tab2")] == list(data.orders.columns)
+
+
+def test_filter_df_matches_a_boolean_mask(app):
+    data = app.snapshots.current()
+    filtered = app.filter_df(data.orders, *FILTERS)
+    assert list(filtered["Order ID"]) == list(_expected_orders(app, *FILTERS)["Order ID"])
+
+
+def test_sparklines_count_the_filtered_orders(app):
+    figures = app.update_sparklines(*FILTERS)
+    assert len(figures) == len(app.params) - 1
+    expected = _expected_orders(app, *FILTERS)["Start Date"].value_counts()
+    assert _decode(figures[0]["data"][0]["y"]).sum() == expected.sum()
+
+
+def test_results_are_memoized_per_data_version(app):
+    app.result_cache.clear()
+    first = app.update_sparklines(*FILTERS)
+    hits = app.result_cache.hits
+    # Same filters in another selection order
+    assert app.update_sparklines(FILTERS[0][::-1], *FILTERS[1:]) is first
+    assert app.result_cache.hits == hits + 1
+
+
+def test_deviation_cells_fit_their_bars(app):
+    cells = app.update_deviation_cells(None, None, "2016-01-01", "2017-12-31", None)
+    metrics = len(app.params) - 1
+    percents, bars = cells[:metrics], cells[metrics:]
+    assert all(0 <= bar <= app.SD_BAR_MAX for bar in bars)
+    assert len(percents) == metrics
+
+
+def test_control_chart_draws_counts_and_limits(app):
+    figure = app.generate_graph("Start Date Count", *FILTERS)
+    names = [trace["name"] for trace in figure["data"]]
+    assert names == ["Start Date Count", "Mean", "+1SD", "-1SD", "+2SD", "-2SD", "+3SD", "-3SD", "Out of control"]
+    # Two years of days fit the point budget, so the line is every day of the range
+    assert _decode(figure["data"][0]["y"]).sum() == len(_expected_orders(app, *FILTERS))
+
+
+def test_active_placements_end_on_the_active_count(app):
+    figure, active = app.update_active_placements(None, ["Travel"], "2016-01-01", "2016-06-30", None)
+    orders = app.snapshots.current().orders
+    day = pd.Timestamp("2016-06-30")
+    travel = orders[orders["Order Type"] == "Travel"]
+    assert active == int(((travel["Start Date"] <= day) & ~(travel["End Date"] < day)).sum())
+
+
+def test_drilldown_table_pages_sorted_and_filtered_rows(app):
+    values = {
+        "sourceList.value": None, "orderTypeList.value": None, "clientTypeList.value": None,
+        "date-range.start_date": "2016-01-01", "date-range.end_date": "2016-12-31",
+        "drilldown-table.page_current": 1, "drilldown-table.page_size": 10,
+        "drilldown-table.sort_by": [{"column_id": "End Date", "direction": "desc"}],
+        "drilldown-table.filter_query": '{Order Type} icontains "travel"',
+    }
+    table = _call(app, "drilldown-table.data", values, ["drilldown-table.page_current"])["drilldown-table"]
+    orders = _expected_orders(app, None, ["Travel"], "2016-01-01", "2016-12-31", None)
+    expected = orders.sort_values("End Date", ascending=False, kind="stable")
+    assert table["page_count"] == -(-len(orders) // 10) and table["page_current"] == 1
+    assert [row["Order ID"] for row in table["data"]] == list(expected["Order ID"].iloc[10:20])
+
+    # Any other change goes back to the first page
+    table = _call(app, "drilldown-table.data", values, ["drilldown-table.sort_by"])["drilldown-table"]
+    assert table["page_current"] == 0
+
+
+@pytest.mark.parametrize("export_format", ["csv", "parquet"])
+def test_export_streams_every_filtered_order(app, export_format):
+    query = "sourceList=Indeed&sourceList=Website&orderTypeList=Travel&orderTypeList=Contract" \
+            "&start_date=2016-01-01&end_date=2017-12-31"
+    response = app.server.test_client().get("/export/orders.{}?{}".format(export_format, query))
+    expected = _expected_orders(app, *FILTERS)
+    assert response.status_code == 200 and response.headers["X-Export-Rows"] == str(len(expected))
+    if export_format == "csv":
+        exported = pd.read_csv(io.BytesIO(response.data), dtype=str)
+    else:
+        exported = pd.read_parquet(io.BytesIO(response.data))
+    assert list(exported["Order ID"]) == list(expected["Order ID"])
+
+
+def test_unknown_export_format_is_not_found(app):
+    assert app.server.test_client().get("/export/orders.xlsx").status_code == 404
+
+
+@pytest.mark.parametrize("query", ["start_date=bad", "end_date=2016-13-01", "start_date=NaT"])
+def test_malformed_export_date_is_a_bad_request(app, query):
+    assert app.server.test_client().get("/export/orders.csv?" + query).status_code == 400
+
+
+def test_metrics_endpoint_reports_callbacks(app):
+    app.server.test_client().get("/export/orders.csv?start_date=2016-01-01&end_date=2016-01-02")
+    body = app.server.test_client().get("/metrics").get_data(as_text=True)
+    assert "remede_http_request_duration_seconds_count{route=\"/export/orders.<export_format>\"" in body
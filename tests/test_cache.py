@@ -0,0 +1,163 @@
+import socketserver
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from cache import LRUCache, RedisCache, SQLiteCache, normalize_filters, shared_cache_from_url
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """
+    Answer the few Redis commands the cache sends: GET, SET [EX seconds], SELECT and AUTH.
+    """
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper()
+            self.server.commands.append(name)
+            if name == b"GET":
+                value, expires = store.get(args[1], (None, None))
+                if value is None or expires is not None and expires <= time.time():
+                    self.wfile.write(b"$-1\r\n")
+                else:
+                    self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+            elif name == b"SET":
+                expires = time.time() + int(args[4]) if len(args) > 4 and args[3].upper() == b"EX" else None
+                store[args[1]] = (args[2], expires)
+                self.wfile.write(b"+OK\r\n")
+            elif name in (b"SELECT", b"AUTH"):
+                self.wfile.write(b"+OK\r\n")
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    server.commands = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_normalize_filters_ignores_selection_order_and_time():
+    assert normalize_filters(["b", "a"], [], "2019-01-01T00:00:00") == (("a", "b"), None, "2019-01-01")
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_lru_cache_drops_entries_of_old_version():
+    cache = LRUCache(version=1)
+    cache.set("a", 1)
+    cache.set_version(2)
+    assert len(cache) == 0
+
+
+def test_memoize_reuses_result_for_equivalent_filters():
+    calls = []
+    cache = LRUCache(version=1)
+
+    @cache.memoize()
+    def count(selection):
+        calls.append(selection)
+        return len(selection)
+
+    assert count(["a", "b"]) == 2
+    assert count(["b", "a"]) == 2
+    assert len(calls) == 1
+
+
+def test_redis_cache_round_trips_results(resp_server):
+    cache = RedisCache(port=resp_server.server_address[1], db=1)
+    key = cache.make_key(("graph", 1, "a"), 1)
+    cache.set(key, {"x": np.arange(3), "y": (np.int64(2), 1.5)})
+    assert cache.get(key) == {"x": [0, 1, 2], "y": [2, 1.5]}
+    assert resp_server.commands[:3] == [b"SELECT", b"SET", b"GET"]
+
+
+def test_redis_cache_entries_expire(resp_server):
+    cache = RedisCache(port=resp_server.server_address[1])
+    cache.set("remede:1:a", [1, 2], ttl=1)
+    assert cache.get("remede:1:a") == [1, 2]
+    key, (value, expires) = next(iter(resp_server.store.items()))
+    resp_server.store[key] = (value, time.time() - 1)
+    assert cache.get("remede:1:a", "missing") == "missing"
+
+
+def test_redis_cache_never_unpickles(resp_server):
+    cache = RedisCache(port=resp_server.server_address[1])
+    # A pickle that would call os.system when loaded
+    resp_server.store[b"remede:1:evil"] = (b"cos\nsystem\n(S'exit 1'\ntR.", None)
+    assert cache.get("remede:1:evil", "missing") == "missing"
+
+
+def test_redis_cache_unreachable_is_a_miss():
+    cache = RedisCache(port=1, timeout=0.2)
+    cache.set("remede:1:a", [1])
+    assert cache.get("remede:1:a", "missing") == "missing"
+
+
+def test_sqlite_cache_round_trips_and_expires(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("remede:1:a", {"figure": {"data": []}})
+    cache.set("remede:1:b", [1], ttl=-1)
+    assert cache.get("remede:1:a") == {"figure": {"data": []}}
+    assert cache.get("remede:1:b", "missing") == "missing"
+
+
+def test_shared_cache_skips_values_json_cannot_hold(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("remede:1:a", object())
+    assert cache.get("remede:1:a", "missing") == "missing"
+
+
+def test_memoize_reads_results_of_other_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = LRUCache(version=1, shared=SQLiteCache(path))
+    second = LRUCache(version=1, shared=SQLiteCache(path))
+    calls = []
+
+    def total(values):
+        calls.append(values)
+        return sum(values)
+
+    assert first.memoize("total")(total)([1, 2]) == 3
+    assert second.memoize("total")(total)([2, 1]) == 3
+    assert len(calls) == 1 and second.shared_hits == 1
+
+
+def test_shared_cache_from_url():
+    assert shared_cache_from_url("") is None
+    cache = shared_cache_from_url("redis://:secret@cache:6380/2")
+    assert (cache.host, cache.port, cache.db, cache.password) == ("cache", 6380, 2, "secret")
+    with pytest.raises(ValueError):
+        shared_cache_from_url("memcached://cache")
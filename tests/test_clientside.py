@@ -0,0 +1,72 @@
+import base64
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="needs node to run assets/clientside.js")
+
+CLIENTSIDE_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "clientside.js")
+
+# Loads clientside.js as the browser would and answers every case from the count table
+RUNNER = """
+global.window = {};
+global.dash_clientside = {no_update: null, callback_context: {triggered: []}};
+eval(require("fs").readFileSync(process.argv[1], "utf8"));
+const remede = window.dash_clientside.remede;
+const input = JSON.parse(require("fs").readFileSync(0, "utf8"));
+console.log(JSON.stringify(input.cases.map(function (c) {
+    return {
+        sparklines: remede.sparklines(c[0], c[1], c[2], c[3], c[4], input.table).map(function (figure) {
+            return {x: figure.data[0].x, y: figure.data[0].y, name: figure.data[0].name};
+        }),
+        piechart: remede.piechart(c[2], c[3], input.table).data[0]
+    };
+})));
+"""
+
+CASES = [
+    [None, None, "2016-01-01", "2016-02-15", None],
+    # Weekly totals, from a Wednesday
+    [None, ["Contract"], "2016-01-06", "2017-06-30", None],
+    [["Indeed", "Website"], ["Travel"], "2015-06-01T00:00:00", "2017-12-31", ["Hospital"]],
+    [["LinkedIn"], None, "2016-03-01", None, ["School", "Clinic"]],
+    [None, None, None, None, None],
+]
+
+
+def _values(spec):
+    if isinstance(spec, dict):
+        return np.frombuffer(base64.b64decode(spec["bdata"]), dtype=np.dtype(spec["dtype"])).tolist()
+    return list(spec)
+
+
+def _trace(trace):
+    y = _values(trace["y"])
+    if "x0" in trace:
+        start = int(np.datetime64(trace["x0"], "ms").astype(np.int64))
+        x = [start + index * trace["dx"] for index in range(len(y))]
+    else:
+        x = _values(trace["x"])
+    return {"x": [int(value) for value in x], "y": [int(value) for value in y], "name": trace["name"]}
+
+
+def test_browser_filtering_matches_the_server(app):
+    table = app.client_count_table()
+    result = subprocess.run(
+        ["node", "-e", RUNNER, CLIENTSIDE_JS], input=json.dumps({"table": table, "cases": CASES}),
+        capture_output=True, text=True, check=True,
+    )
+    for case, computed in zip(CASES, json.loads(result.stdout)):
+        expected = [_trace(figure["data"][0]) for figure in app.update_sparklines(*case)]
+        sparklines = [
+            {"x": [int(value) for value in trace["x"]], "y": trace["y"], "name": trace["name"]}
+            for trace in computed["sparklines"]
+        ]
+        assert sparklines == expected, case
+        pie = app.update_piechart(case[2], case[3])["data"][0]
+        assert dict(zip(computed["piechart"]["labels"], computed["piechart"]["values"])) == \
+            {label: value for label, value in zip(pie["labels"], pie["values"]) if value}, case
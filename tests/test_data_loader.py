@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+from data_loader import (
+    CACHE_DIR,
+    ORDERS_FILE,
+    TEMPS_FILE,
+    drop_restated_orders,
+    load_data,
+    merge_orders,
+    order_change_keys,
+    parse_dates,
+    read_exports,
+    read_orders_delta,
+)
+
+
+def _filled(frame):
+    return frame.astype(object).where(frame.notna(), "")
+
+
+def test_parse_dates_to_midnight_days():
+    parsed = parse_dates(pd.Series(["01/02/2020 13:45", None, "01/02/2020 13:45"]), "%m/%d/%Y %H:%M")
+    assert parsed.dtype == np.dtype("datetime64[s]")
+    assert parsed[0] == np.datetime64("2020-01-02") and np.isnat(parsed[1])
+
+
+def test_parse_dates_infers_when_format_does_not_match():
+    parsed = parse_dates(pd.Series(["2020-01-02", "2020-03-04"]), "%m/%d/%Y")
+    assert list(parsed.astype("datetime64[D]").astype(str)) == ["2020-01-02", "2020-03-04"]
+
+
+def test_exports_share_one_dictionary_per_id_column(exports_path):
+    orders, temps, clients, _ = read_exports(exports_path)
+    assert orders["Temp ID"].dtype == temps["Temp ID"].dtype
+    assert orders["Client ID"].dtype == clients["Client ID"].dtype
+    assert orders["Client Type"].dtype == clients["Client Type"].dtype
+
+
+def test_orders_are_sorted_and_enriched(exports_path):
+    orders, temps, clients, _ = read_exports(exports_path)
+    assert orders["Start Date"].is_monotonic_increasing
+    expected = orders[["Temp ID"]].astype(str).merge(
+        temps[["Temp ID", "Referral Source"]].astype(str).drop_duplicates("Temp ID"), how="left", on="Temp ID"
+    )["Referral Source"]
+    assert list(orders["Referral Source"].astype(str)) == list(expected)
+    expected = orders[["Client ID"]].astype(str).merge(
+        clients[["Client ID", "Master Client"]].astype(str).drop_duplicates("Client ID"), how="left", on="Client ID"
+    )["Master Client"]
+    assert list(orders["Master Client"].astype(str)) == list(expected)
+
+
+def test_orders_read_in_chunks_match_one_read(exports_path, monkeypatch):
+    whole = read_exports(exports_path)[0]
+    load_orders = data_loader.load_orders
+    monkeypatch.setattr(data_loader, "load_orders", lambda *args: load_orders(*args, chunksize=250))
+    chunked = read_exports(exports_path)[0]
+    assert (chunked.dtypes == whole.dtypes).all()
+    pd.testing.assert_frame_equal(_filled(chunked), _filled(whole))
+
+
+def test_load_data_is_served_from_cache_until_an_export_changes(fresh_exports, monkeypatch):
+    first = load_data(fresh_exports)
+    assert os.path.exists(os.path.join(fresh_exports, CACHE_DIR, "orders.feather"))
+
+    def fail(_):
+        raise AssertionError("exports parsed again")
+
+    monkeypatch.setattr(data_loader, "read_exports", fail)
+    cached = load_data(fresh_exports)
+    # Feather reads missing text back as None where the parse had NaN
+    assert (cached[0].dtypes == first[0].dtypes).all()
+    pd.testing.assert_frame_equal(_filled(cached[0]), _filled(first[0]))
+
+    monkeypatch.undo()
+    with open(os.path.join(fresh_exports, TEMPS_FILE), "a") as f:
+        f.write("First,Last,RN,ICU,Per Diem,999999,01/01/2020 10:00,01/01/2020 10:00,,Indeed,\n")
+    assert "999999" in load_data(fresh_exports)[1]["Temp ID"].values
+
+
+def test_drop_restated_orders_keeps_the_last_row():
+    orders = pd.DataFrame({"Order ID": ["1", "2", "1", None, None], "Order Type": ["a", "b", "c", "d", "e"]})
+    kept, keys = drop_restated_orders(orders, order_change_keys(orders))
+    assert list(kept["Order Type"]) == ["b", "c", "d", "e"]
+    assert list(keys["Order ID"].fillna("")) == ["2", "1", "", ""]
+
+
+def test_merge_orders_inserts_after_equal_dates():
+    days = pd.to_datetime(["2020-01-01", "2020-01-02", "2020-01-02", "2020-01-05"])
+    kept = pd.DataFrame({"Start Date": days, "Order ID": ["k1", "k2", "k3", "k4"]})
+    added = pd.DataFrame({"Start Date": pd.to_datetime(["2020-01-02", "2020-01-06"]), "Order ID": ["a1", "a2"]})
+    merged, kept_positions, added_positions = merge_orders(kept, added)
+    assert list(merged["Order ID"]) == ["k1", "k2", "k3", "a1", "k4", "a2"]
+    assert list(kept_positions) == [0, 1, 2, 4] and list(added_positions) == [3, 5]
+
+
+def test_read_orders_delta_parses_only_appended_rows(fresh_exports):
+    orders, _, _, keys = load_data(fresh_exports)
+    sources = data_loader.current_sources(fresh_exports)
+    path = os.path.join(fresh_exports, ORDERS_FILE)
+    raw = pd.read_csv(path, dtype=str)
+    appended = raw.iloc[:3].copy()
+    appended["Order ID"] = ["900001", "900002", raw["Order ID"].iloc[10]]
+    with open(path, "a") as f:
+        appended.to_csv(f, header=False, index=False)
+
+    added, dropped, new_keys = read_orders_delta(fresh_exports, sources, keys)
+    assert list(added["Order ID"]) == ["900001", "900002", raw["Order ID"].iloc[10]]
+    assert list(dropped) == [raw["Order ID"].iloc[10]]
+    assert len(new_keys) == len(keys) + 2 and new_keys["Order ID"].is_unique
@@ -0,0 +1,54 @@
+import numpy as np
+
+from downsample import decimate, lttb, rollup, rollup_series
+
+
+def _days(start, count):
+    return np.arange(np.datetime64(start), np.datetime64(start) + count, dtype="datetime64[D]")
+
+
+def test_weekly_rollup_uses_monday_weeks_and_starts_in_range():
+    # 2019-01-01 is a Tuesday
+    dates = _days("2019-01-01", 14)
+    labels, totals = rollup(dates, np.ones(14, dtype=np.int64), "datetime64[W]")
+    assert list(labels.astype(str)) == ["2019-01-01", "2019-01-07", "2019-01-14"]
+    assert list(totals) == [6, 7, 1]
+
+
+def test_monthly_rollup_sums_calendar_months():
+    dates = np.array(["2019-01-15", "2019-01-31", "2019-02-01", "2019-04-02"], dtype="datetime64[D]")
+    labels, totals = rollup(dates, np.array([1, 2, 3, 4]), "datetime64[M]")
+    assert list(labels.astype(str)) == ["2019-01-15", "2019-02-01", "2019-04-01"]
+    assert list(totals) == [3, 3, 4]
+
+
+def test_rollup_series_picks_the_finest_unit_that_fits():
+    dates = _days("2019-01-01", 365)
+    values = np.ones(365, dtype=np.int64)
+    assert rollup_series(dates, values, 400)[2] == "day"
+    rolled_dates, rolled_values, unit = rollup_series(dates, values, 60)
+    assert unit == "week" and len(rolled_dates) <= 60 and rolled_values.sum() == 365
+    rolled_dates, rolled_values, unit = rollup_series(dates, values, 20)
+    assert unit == "month" and len(rolled_dates) == 12 and rolled_values.sum() == 365
+    assert len(rollup_series(_days("2000-01-01", 20 * 365), np.ones(20 * 365), 50)[0]) <= 50
+
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[[250, 600]] = [50, -40]
+    picked = lttb(x, y, 20)
+    assert len(picked) == 20 and picked[0] == 0 and picked[-1] == 999
+    assert 250 in picked and 600 in picked
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_lttb_returns_everything_under_the_threshold():
+    assert list(lttb(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_decimate_always_keeps_requested_points():
+    dates = _days("2019-01-01", 500)
+    values = np.sin(np.arange(500) / 10.0)
+    picked = decimate(dates, values, 50, keep=np.array([3, 444]))
+    assert 3 in picked and 444 in picked and len(picked) <= 52
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from drilldown import filter_rows, page_records, parse_filter_query, sort_rows, table_columns
+
+
+def _frame():
+    return pd.DataFrame({
+        "Order ID": ["10", "9", "100", "11"],
+        "Start Date": pd.to_datetime(["2020-01-02", "2020-01-01", "2020-02-01", None]),
+        "Order Type": pd.Categorical(["Travel", "Per Diem", None, "travel nurse"]),
+        "Contact": ["Ann", "bob", None, " "],
+        "Hours": [8.0, 12.0, 4.0, np.nan],
+    })
+
+
+def test_parse_filter_query_reads_every_operator_form():
+    query = '{Order Type} icontains "travel" && {Hours} >= 8 && {Contact} is blank and {Order ID} s= 10'
+    assert parse_filter_query(query) == [
+        ("Order Type", "contains", False, "travel"),
+        ("Hours", ">=", True, "8"),
+        ("Contact", "blank", True, None),
+        ("Order ID", "=", True, "10"),
+    ]
+    assert parse_filter_query("") == []
+    assert parse_filter_query("{Hours} unknown 3 && garbage") == []
+
+
+def test_filter_rows_on_categories_text_numbers_and_dates():
+    frame = _frame()
+    rows = np.arange(len(frame))
+
+    def matching(query):
+        return list(filter_rows(frame, rows, parse_filter_query(query)))
+
+    assert matching('{Order Type} icontains "TRAVEL"') == [0, 3]
+    assert matching("{Order Type} is blank") == [2]
+    assert matching("{Contact} is blank") == [2, 3]
+    # Ids are text but compare as numbers
+    assert matching("{Order ID} > 10") == [2, 3]
+    assert matching("{Hours} < 10") == [0, 2]
+    assert matching('{Start Date} datestartswith "2020-01"') == [0, 1]
+    assert matching("{Start Date} >= 2020-01-02 && {Hours} >= 8") == [0]
+    assert matching("{Missing} = 1") == [0, 1, 2, 3]
+
+
+def test_sort_rows_puts_missing_values_last_both_ways():
+    frame = _frame()
+    rows = np.arange(len(frame))
+    by_date = [{"column_id": "Start Date", "direction": "asc"}]
+    assert list(sort_rows(frame, rows, by_date)) == [1, 0, 2, 3]
+    by_date[0]["direction"] = "desc"
+    assert list(sort_rows(frame, rows, by_date)) == [2, 0, 1, 3]
+    by_type = [{"column_id": "Order Type", "direction": "asc"}]
+    assert list(sort_rows(frame, rows, by_type)) == [1, 0, 3, 2]
+    assert list(sort_rows(frame, rows, [])) == [0, 1, 2, 3]
+
+
+def test_sort_rows_uses_later_columns_for_ties():
+    frame = pd.DataFrame({"a": [1, 1, 0], "b": ["y", "x", "z"]})
+    sort_by = [{"column_id": "a", "direction": "desc"}, {"column_id": "b", "direction": "asc"}]
+    assert list(sort_rows(frame, np.arange(3), sort_by)) == [1, 0, 2]
+
+
+
+@pytest.mark.parametrize("dtype", ["category", object])
+def test_sort_rows_orders_numeric_ids_by_value(dtype):
+    def ids(*values):
+        return pd.DataFrame({"Order ID": pd.Series(values, dtype=dtype)})
+
+    rows = np.arange(5)
+    ascending = [{"column_id": "Order ID", "direction": "asc"}]
+    descending = [{"column_id": "Order ID", "direction": "desc"}]
+    assert list(sort_rows(ids("10", "9", None, "100", "2"), rows, ascending)) == [4, 1, 0, 3, 2]
+    assert list(sort_rows(ids("10", "9", None, "100", "2"), rows, descending)) == [3, 0, 1, 4, 2]
+    # One id that is not a number sorts the column as text
+    assert list(sort_rows(ids("A10", "9", None, "100", "2"), rows, ascending)) == [3, 4, 1, 0, 2]
+
+def test_page_records_are_json_ready():
+    frame = _frame()
+    records = page_records(frame, np.array([3, 2, 1, 0]), 0, 2)
+    assert records == [
+        {"Order ID": "11", "Start Date": None, "Order Type": "travel nurse", "Contact": " ", "Hours": None},
+        {"Order ID": "100", "Start Date": "2020-02-01", "Order Type": None, "Contact": None, "Hours": 4.0},
+    ]
+    assert page_records(frame, np.array([3, 2, 1, 0]), 5, 2) == []
+
+
+def test_table_columns_types():
+    types = {column["id"]: column["type"] for column in table_columns(_frame())}
+    assert types == {"Order ID": "text", "Start Date": "datetime", "Order Type": "text",
+                     "Contact": "text", "Hours": "numeric"}
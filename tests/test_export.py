@@ -0,0 +1,53 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from export import export_stream, frame_batches, selected_count
+
+
+def _frame():
+    return pd.DataFrame({
+        "Order ID": [str(i) for i in range(10)],
+        "Start Date": pd.date_range("2020-01-01", periods=10),
+        "Order Type": pd.Categorical(["Travel", "Per Diem"] * 5),
+        # Missing in every row of the first batches
+        "Contact": [None] * 8 + ["Ann", "Bob"],
+    })
+
+
+def test_frame_batches_cover_the_selection_once():
+    frame = _frame()
+    batches = list(frame_batches(frame, 2, 9, None, 3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert list(pd.concat(batches)["Order ID"]) == [str(i) for i in range(2, 9)]
+    rows = np.array([0, 4, 5, 9])
+    assert list(pd.concat(frame_batches(frame, 0, 10, rows, 3))["Order ID"]) == ["0", "4", "5", "9"]
+    assert selected_count(2, 9, None) == 7 and selected_count(0, 10, rows) == 4
+
+
+def test_csv_export_streams_header_then_rows():
+    frame = _frame()
+    chunks = list(export_stream("csv", frame, frame_batches(frame, 0, 10, np.array([1, 8]), 1)))
+    assert len(chunks) == 3
+    exported = pd.read_csv(io.StringIO("".join(chunks)), dtype=str)
+    assert list(exported.columns) == list(frame.columns)
+    assert list(exported["Order ID"]) == ["1", "8"] and list(exported["Contact"].fillna("")) == ["", "Ann"]
+
+
+def test_csv_export_of_an_empty_selection_keeps_the_header():
+    frame = _frame()
+    text = "".join(export_stream("csv", frame, frame_batches(frame, 0, 10, np.array([], dtype=int), 4)))
+    assert text.strip() == ",".join(frame.columns)
+
+
+def test_parquet_export_writes_one_row_group_per_batch():
+    frame = _frame()
+    data = b"".join(export_stream("parquet", frame, frame_batches(frame, 0, 10, None, 4)))
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_rows == 10 and parquet.metadata.num_row_groups == 3
+    exported = parquet.read().to_pandas()
+    assert list(exported["Order ID"]) == list(frame["Order ID"])
+    assert list(exported["Contact"].fillna("")) == [""] * 8 + ["Ann", "Bob"]
+    assert str(parquet.schema_arrow.field("Contact").type) == "string"
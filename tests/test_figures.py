@@ -0,0 +1,35 @@
+import base64
+
+import numpy as np
+
+from figures import date_array, scatter, typed_array
+
+
+def _decode(spec, dtype):
+    return np.frombuffer(base64.b64decode(spec["bdata"]), dtype=dtype)
+
+
+def test_typed_array_uses_the_narrowest_integer_type():
+    spec = typed_array(np.array([0, 200, 255], dtype=np.int64))
+    assert spec["dtype"] == "u1" and list(_decode(spec, np.uint8)) == [0, 200, 255]
+    spec = typed_array(np.array([-5, 40000]))
+    assert spec["dtype"] == "i4" and list(_decode(spec, np.int32)) == [-5, 40000]
+
+
+def test_typed_array_sends_other_numbers_as_float64():
+    spec = typed_array(np.array([1.5, np.nan]))
+    assert spec["dtype"] == "f8" and _decode(spec, np.float64)[0] == 1.5
+
+
+def test_date_array_is_epoch_milliseconds():
+    spec = date_array(np.array(["1970-01-02", "2020-01-01"], dtype="datetime64[D]"))
+    assert spec["dtype"] == "f8" and list(_decode(spec, np.float64)) == [86400000, 1577836800000]
+
+
+def test_scatter_sends_evenly_spaced_dates_as_start_and_step():
+    days = np.arange("2020-01-01", "2020-01-05", dtype="datetime64[D]")
+    trace = scatter(days, [1, 2, 3, 4], mode="lines")
+    assert trace["x0"].startswith("2020-01-01") and trace["dx"] == 86400000
+    assert "x" not in trace and trace["mode"] == "lines"
+    trace = scatter(days[[0, 1, 3]], [1, 2, 3])
+    assert "x0" not in trace and trace["x"]["dtype"] == "f8"
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+diskcache = pytest.importorskip("diskcache")
+pytest.importorskip("multiprocess")
+
+from jobs import NO_JOB, SharedJobManager, job_manager  # noqa: E402
+
+
+def _slow_job(key, progress_key, args, context):
+    time.sleep(30)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = SharedJobManager(diskcache.Cache(str(tmp_path / "jobs")), cache_by=[lambda: 1], expire=60)
+    yield manager
+    manager.handle.close()
+
+
+def _wait_stopped(manager, job):
+    deadline = time.time() + 5
+    while manager.job_running(job) and time.time() < deadline:
+        time.sleep(0.05)
+    return not manager.job_running(job)
+
+
+def test_identical_requests_share_one_job(manager):
+    first = manager.call_job_fn("key", _slow_job, [], {})
+    second = manager.call_job_fn("key", _slow_job, [], {})
+    try:
+        assert first == second and manager.job_running(first)
+        # The first request giving up leaves the job to the second
+        manager.terminate_job(first)
+        assert manager.job_running(first)
+        manager.terminate_job(second)
+        assert _wait_stopped(manager, first)
+        # Nobody waits on the old job anymore, so the next request starts a new one
+        third = manager.call_job_fn("key", _slow_job, [], {})
+        assert third != first
+        manager.terminate_job(third)
+    finally:
+        for job in (first, second):
+            if manager.job_running(job):
+                super(SharedJobManager, manager).terminate_job(job)
+
+
+def test_finished_results_start_no_job(manager):
+    manager.handle.set("done", ["result"])
+    job = manager.call_job_fn("done", _slow_job, [], {})
+    assert job == NO_JOB and not manager.job_running(job)
+    manager.terminate_job(job)
+
+
+def test_job_manager_stores_jobs_under_path(tmp_path):
+    manager = job_manager(str(tmp_path / "jobs"), [lambda: 1], expire=10)
+    assert isinstance(manager, SharedJobManager) and manager.expire == 10
+    assert (tmp_path / "jobs").is_dir()
+    manager.handle.close()
@@ -0,0 +1,45 @@
+import flask
+
+from metrics import Histogram, Metrics, count_cache_hit, count_rows
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", (0.1, 1.0), ("route",))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, '/a"b')
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert lines[2:] == [
+        'demo_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'demo_seconds_bucket{route="/a\\"b",le="1.0"} 3',
+        'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a\\"b"} 4.05',
+        'demo_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+def test_wrapped_callback_records_rows_and_cache_hits():
+    metrics = Metrics()
+
+    def callback():
+        count_rows(1500)
+        count_cache_hit()
+        return "response"
+
+    assert metrics.wrap_callback("callback", callback)() == "response"
+    rendered = metrics.render()
+    assert 'remede_callback_rows_scanned_bucket{callback="callback",le="1000"} 0' in rendered
+    assert 'remede_callback_rows_scanned_bucket{callback="callback",le="10000"} 1' in rendered
+    assert 'remede_callback_cache_hits_sum{callback="callback"} 1' in rendered
+    assert 'remede_callback_response_bytes_sum{callback="callback"} 8' in rendered
+
+
+def test_install_times_requests_and_serves_metrics():
+    server = flask.Flask(__name__)
+    server.add_url_rule("/hello", "hello", lambda: "hello")
+    Metrics().install(server)
+    client = server.test_client()
+    assert client.get("/hello").data == b"hello"
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'remede_http_request_duration_seconds_count{route="/hello",method="GET",status="200"} 1' in body
+    assert 'remede_http_response_bytes_sum{route="/hello",method="GET",status="200"} 5' in body
@@ -0,0 +1,105 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import ORDERS_FILE
+from snapshot import DataWatcher, SnapshotStore, build_snapshot, update_snapshot
+
+
+def _assert_same_data(incremental, full):
+    assert list(incremental.orders["Order ID"]) == list(full.orders["Order ID"])
+    for column in full.orders.columns:
+        assert list(incremental.orders[column].astype(str)) == list(full.orders[column].astype(str)), column
+    pd.testing.assert_frame_equal(
+        incremental.df.sort_values("Dates", ignore_index=True), full.df.sort_values("Dates", ignore_index=True)
+    )
+    for metric, cube in full.cubes.items():
+        for left, right in zip(incremental.cubes[metric].series(None, None, [None] * 3), cube.series(None, None, [None] * 3)):
+            assert np.array_equal(left, right), metric
+    selections = {"Order Type": ["Travel"], "Client Type": ["Hospital", "New Type"]}
+    assert np.array_equal(incremental.filter_index.select(selections), full.filter_index.select(selections))
+    assert incremental.dropdown_options == full.dropdown_options
+
+
+def test_appended_orders_are_merged_incrementally(fresh_exports):
+    previous = build_snapshot(fresh_exports)
+    path = os.path.join(fresh_exports, ORDERS_FILE)
+    raw = pd.read_csv(path, dtype=str)
+    appended = raw.sample(50, random_state=0)
+    appended["Order ID"] = [str(900000 + i) for i in range(50)]
+    appended.iloc[:3, appended.columns.get_loc("Client Type")] = "New Type"
+    # Restate an existing order with a new order type
+    appended.iloc[3, appended.columns.get_loc("Order ID")] = raw["Order ID"].iloc[0]
+    appended.iloc[3, appended.columns.get_loc("Order Type")] = "Restated"
+    with open(path, "a") as f:
+        appended.to_csv(f, header=False, index=False)
+
+    snapshot, incremental = update_snapshot(previous, fresh_exports, 2)
+    assert incremental and snapshot.version == 2
+    assert snapshot.data_version != previous.data_version
+    assert len(snapshot.orders) == len(previous.orders) + 49
+    _assert_same_data(snapshot, build_snapshot(fresh_exports))
+
+
+def test_edited_and_removed_orders_are_patched_incrementally(fresh_exports):
+    previous = build_snapshot(fresh_exports)
+    path = os.path.join(fresh_exports, ORDERS_FILE)
+    raw = pd.read_csv(path, dtype=str)
+    raw.loc[raw.index[:20], "Start Date"] = "01/15/2021"
+    raw.drop(raw.index[100:150]).to_csv(path, index=False)
+
+    snapshot, incremental = update_snapshot(previous, fresh_exports, 2)
+    assert incremental and len(snapshot.orders) == len(previous.orders) - 50
+    full = build_snapshot(fresh_exports)
+    # Edited rows come after unchanged rows of the same day, so compare as sets of rows
+    key = ["Start Date", "Order ID"]
+    left = snapshot.orders.sort_values(key, ignore_index=True).astype(str)
+    right = full.orders.sort_values(key, ignore_index=True).astype(str)
+    pd.testing.assert_frame_equal(left, right)
+
+
+def test_changed_temps_fall_back_to_a_full_load(fresh_exports):
+    previous = build_snapshot(fresh_exports)
+    with open(os.path.join(fresh_exports, "temps23071901_50_00.csv"), "a") as f:
+        f.write("First,Last,RN,ICU,Per Diem,999999,01/01/2020 10:00,01/01/2020 10:00,,Indeed,\n")
+    snapshot, incremental = update_snapshot(previous, fresh_exports, 2)
+    assert not incremental and len(snapshot.temps) == len(previous.temps) + 1
+
+
+def test_snapshot_store_loads_once_for_concurrent_readers():
+    calls = []
+    swaps = []
+    gate = threading.Event()
+
+    def loader():
+        gate.wait(1)
+        calls.append(1)
+        return "snapshot"
+
+    store = SnapshotStore(loader=loader)
+    store.on_swap(swaps.append)
+    assert not store.loaded()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.current())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["snapshot"] * 4 and len(calls) == 1 and swaps == ["snapshot"]
+    store.swap("next")
+    assert store.current() == "next" and swaps == ["snapshot", "next"]
+
+
+def test_data_watcher_reload_swaps_in_new_exports(fresh_exports):
+    store = SnapshotStore(build_snapshot(fresh_exports))
+    watcher = DataWatcher(store, fresh_exports)
+    assert watcher.reload() is store.current()
+    path = os.path.join(fresh_exports, ORDERS_FILE)
+    raw = pd.read_csv(path, dtype=str)
+    raw.iloc[:1].assign(**{"Order ID": "900000"}).to_csv(path, mode="a", header=False, index=False)
+    reloaded = watcher.reload()
+    assert store.current() is reloaded and reloaded.version == 2
+    assert "900000" in set(reloaded.orders["Order ID"])
@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+
+from data_loader import CLIENTS_FILE, ORDERS_FILE, TEMPS_FILE
+from synthetic import REFERRAL_SOURCES, parse_scale, skewed_weights
+
+
+def test_parse_scale_reads_suffixes():
+    assert [parse_scale(value) for value in ("10000", "10k", "2.5M")] == [10000, 10000, 2500000]
+
+
+def test_skewed_weights_fall_off_with_rank():
+    weights = skewed_weights(4, 1.2)
+    assert abs(weights.sum() - 1) < 1e-12 and list(weights) == sorted(weights, reverse=True)
+    assert len(set(skewed_weights(4, 0).round(12))) == 1
+
+
+def test_generated_exports_have_the_requested_size(exports_path):
+    orders = pd.read_csv(os.path.join(exports_path, ORDERS_FILE), dtype=str)
+    temps = pd.read_csv(os.path.join(exports_path, TEMPS_FILE), dtype=str)
+    assert len(orders) == 3000 and orders["Order ID"].is_unique
+    assert len(temps) == 300 and len(pd.read_csv(os.path.join(exports_path, CLIENTS_FILE))) == 60
+    # The most popular referral source comes first
+    assert temps["Referral Source"].value_counts().index[0] == REFERRAL_SOURCES[0]